@@ -7,6 +7,65 @@ digits = '123456789'
 rows = 'ABCDEFGHI'
 
 
+# Colors of a solved square and of a square that is still open.
+SOLVED_COLOR = (2, 204, 186)
+OPEN_COLOR = (255, 255, 255)
+SQUARE_SIZE = (45, 40)
+
+
+def square_position(x, y):
+    """Return the top left corner of the square in column x and row y of the board image."""
+    if x in (0, 1, 2):  startX = (x * 57) + 38
+    if x in (3, 4, 5):  startX = (x * 57) + 99
+    if x in (6, 7, 8):  startX = (x * 57) + 159
+
+    if y in (0, 1, 2):  startY = (y * 57) + 35
+    if y in (3, 4, 5):  startY = (y * 57) + 100
+    if y in (6, 7, 8):  startY = (y * 57) + 165
+    return startX, startY
+
+
+class BoardRenderer(object):
+    """Draws Sudoku boards, redrawing only the squares that changed since the last board.
+
+    The font is loaded, and the digits and the two kinds of rounded squares are
+    rendered, once when the renderer is created. Drawing a board then only blits
+    the cached surfaces of the squares whose digit changed.
+    """
+
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        font = pygame.font.SysFont('opensans', 21)
+        self.glyphs = dict((d, font.render(d, 1, (255, 255, 255))) for d in digits)
+        self.tiles = {True: SudokuSquare.roundedRectSurface(SQUARE_SIZE, SOLVED_COLOR),
+                      False: SudokuSquare.roundedRectSurface(SQUARE_SIZE, OPEN_COLOR)}
+        self.squares = [(rows[y] + digits[x], pygame.Rect(square_position(x, y), SQUARE_SIZE))
+                        for y in range(9) for x in range(9)]
+        # The digit drawn in each square, or None for an open square.
+        self.shown = None
+
+    def draw(self, values):
+        """Draw a board in dictionary form and return the list of rectangles that changed."""
+        first = self.shown is None
+        if first:
+            self.screen.blit(self.background, (0, 0))
+            self.shown = {}
+        dirty = []
+        for box, rect in self.squares:
+            value = values[box]
+            digit = value if len(value) == 1 and value in self.glyphs else None
+            if box in self.shown and self.shown[box] == digit:
+                continue
+            self.shown[box] = digit
+            self.screen.blit(self.background, rect, rect)
+            self.screen.blit(self.tiles[digit is not None], rect)
+            if digit is not None:
+                self.screen.blit(self.glyphs[digit], rect.move(17, 4))
+            dirty.append(rect)
+        return [self.screen.get_rect()] if first else dirty
+
+
 def play(values_list):
     pygame.init()
 
@@ -18,40 +77,10 @@ def play(values_list):
 
     clock = pygame.time.Clock()
 
-    # The puzzleNumber sets a seed so either generate
-    # a random number to fill in here or accept user
-    # input for a duplicatable puzzle.
-
+    renderer = BoardRenderer(screen, background_image)
     for values in values_list:
         pygame.event.pump()
-        theSquares = []
-        initXLoc = 0
-        initYLoc = 0
-        startX, startY, editable, number = 0, 0, "N", 0
-        for y in range(9):
-            for x in range(9):
-                if x in (0, 1, 2):  startX = (x * 57) + 38
-                if x in (3, 4, 5):  startX = (x * 57) + 99
-                if x in (6, 7, 8):  startX = (x * 57) + 159
-
-                if y in (0, 1, 2):  startY = (y * 57) + 35
-                if y in (3, 4, 5):  startY = (y * 57) + 100
-                if y in (6, 7, 8):  startY = (y * 57) + 165
-                col = digits[x]
-                row = rows[y]
-                string_number = values[row + col]
-                if len(string_number) > 1 or string_number == '' or string_number == '.':
-                    number = None
-                else:
-                    number = int(string_number)
-                theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
-
-        screen.blit(background_image, (0, 0))
-        for num in theSquares:
-            num.draw()
-
-        pygame.display.flip()
-        pygame.display.update()
+        pygame.display.update(renderer.draw(values))
         clock.tick(5)
 
     # leave game showing until closed by user
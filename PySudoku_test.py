@@ -0,0 +1,51 @@
+import os
+import solution_test
+import unittest
+
+try:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    import PySudoku
+except ImportError:
+    pygame = None
+
+
+@unittest.skipIf(pygame is None, 'pygame is not installed')
+class TestBoardRenderer(unittest.TestCase):
+
+    def setUp(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode((700, 700))
+        background = pygame.Surface((700, 700))
+        background.fill((40, 40, 40))
+        self.renderer = PySudoku.BoardRenderer(self.screen, background)
+
+    def tearDown(self):
+        pygame.quit()
+
+    def test_dirty_squares(self):
+        values = dict(solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertEqual(self.renderer.draw(values), [self.screen.get_rect()])
+        self.assertEqual(self.renderer.draw(values), [])
+        values['A1'] = '23'
+        values['I9'] = '5'
+        dirty = self.renderer.draw(values)
+        self.assertEqual([rect.topleft for rect in dirty], [PySudoku.square_position(0, 0), PySudoku.square_position(8, 8)])
+
+    def test_matches_squares(self):
+        # The cached tiles and glyphs draw the same pixels as SudokuSquare.
+        values = dict(solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+        values['B2'] = '123'
+        self.renderer.draw(values)
+        expected = self.screen.copy()
+        self.screen.blit(self.renderer.background, (0, 0))
+        for y in range(9):
+            for x in range(9):
+                value = values[PySudoku.rows[y] + PySudoku.digits[x]]
+                number = int(value) if len(value) == 1 else None
+                PySudoku.SudokuSquare.SudokuSquare(number, *PySudoku.square_position(x, y)).draw()
+        self.assertEqual(pygame.image.tostring(self.screen, 'RGB'), pygame.image.tostring(expected, 'RGB'))
+
+
+if __name__ == '__main__':
+    unittest.main()
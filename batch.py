@@ -0,0 +1,111 @@
+"""Solve many Sudoku grids at once across a pool of worker processes.
+
+Every worker runs its own copy of the solver, so nothing is shared between
+puzzles: the solver keeps its state on the board it is solving, and a
+tracing recorder that was active in the parent is switched off when a worker
+starts.
+
+Grids are read lazily and handed out in chunks, with only a few chunks per
+worker in flight at any time, so arbitrarily long inputs are solved in
+bounded memory.
+"""
+import collections
+import concurrent.futures
+import itertools
+import os
+import time
+
+import bitboard
+import solution
+import tracing
+
+
+def _init_worker():
+    tracing.deactivate()
+
+
+def _solve(puzzle, engine):
+    if isinstance(puzzle, str):
+        return solution.solve(puzzle, engine=engine)
+    # A board of candidate masks, such as a packed.py BOARDS record; only the bitboard engine keeps them.
+    board = bitboard.search(puzzle)
+    return bitboard.board_values(board) if board else False
+
+
+def _solve_chunk(engine, timed, chunk):
+    results = []
+    for index, puzzle in chunk:
+        if timed:
+            start = time.perf_counter()
+            result = _solve(puzzle, engine)
+            results.append((index, result, time.perf_counter() - start))
+        else:
+            results.append((index, _solve(puzzle, engine)))
+    return results
+
+
+def _chunks(items, size):
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_solve(grids, workers=None, chunksize=16, ordered=True, engine='bitboard', timed=False):
+    """Solve grids lazily, yielding each result as soon as it is available.
+
+    Args:
+        grids: iterable of grid strings, or of bitboard.py boards, which are solved by the
+            bitboard engine whatever the engine. It is consumed lazily.
+        workers(int): number of worker processes, defaults to the number of CPUs.
+            With workers=1 the grids are solved in this process.
+        chunksize(int): number of grids handed to a worker at a time.
+        ordered(bool): yield results in input order, or as they complete if False.
+        engine(string): solver engine passed to solution.solve().
+        timed(bool): also yield the time spent solving each grid, in seconds.
+    Returns:
+        A generator of (index, solution) tuples, or (index, solution, seconds) when timed,
+        where solution is the value returned by solution.solve() for the index-th grid.
+    """
+    chunks = _chunks(enumerate(grids), chunksize)
+    if workers == 1:
+        for chunk in chunks:
+            for result in _solve_chunk(engine, timed, chunk):
+                yield result
+        return
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+        def submit(count):
+            return [executor.submit(_solve_chunk, engine, timed, chunk)
+                    for chunk in itertools.islice(chunks, count)]
+
+        if ordered:
+            pending = collections.deque(submit(2 * workers))
+            while pending:
+                results = pending.popleft().result()
+                pending.extend(submit(1))
+                for result in results:
+                    yield result
+        else:
+            pending = set(submit(2 * workers))
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                pending.update(submit(len(done)))
+                for future in done:
+                    for result in future.result():
+                        yield result
+
+
+def solve_many(grids, workers=None, chunksize=16, engine='bitboard'):
+    """Solve a batch of grids and return the solutions in input order.
+
+    Args:
+        grids: iterable of grid strings.
+        workers(int): number of worker processes, defaults to the number of CPUs.
+        chunksize(int): number of grids handed to a worker at a time.
+        engine(string): solver engine passed to solution.solve().
+    Returns:
+        A list with the value returned by solution.solve() for each grid.
+    """
+    return [result for _, result in iter_solve(grids, workers, chunksize, True, engine)]
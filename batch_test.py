@@ -0,0 +1,20 @@
+import batch
+import solution_test
+import unittest
+
+
+class TestSolveMany(unittest.TestCase):
+    grids = [solution_test.TestDiagonalSudoku.diagonal_grid, '11' + '.' * 79] * 3
+
+    def test_solve_many(self):
+        expected = [solution_test.TestDiagonalSudoku.solved_diag_sudoku, False] * 3
+        self.assertEqual(batch.solve_many(self.grids, workers=2, chunksize=1), expected)
+        self.assertEqual(batch.solve_many(self.grids, workers=1), expected)
+
+    def test_iter_solve_unordered(self):
+        results = sorted(batch.iter_solve(iter(self.grids), workers=2, chunksize=1, ordered=False))
+        self.assertEqual([index for index, _ in results], list(range(len(self.grids))))
+        self.assertEqual(results[1][1], False)
+
+if __name__ == '__main__':
+    unittest.main()
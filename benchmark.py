@@ -0,0 +1,212 @@
+"""Benchmark the solver engines on the puzzle corpora and track regressions.
+
+The corpora live in corpora/<tier>.txt, one grid per line:
+
+    easy        unique puzzles with about 40 clues
+    hard        the slowest minimal puzzles out of a few hundred generated ones
+    diagonal    minimal puzzles that are only unique thanks to the diagonals
+    unsolvable  puzzles that propagation alone cannot prove unsolvable
+
+Tiers named generated-<difficulty> are made on the fly by generator.py.
+
+For every engine and tier the harness reports solves per second, latency
+percentiles, peak traced memory and search node, backtrack and propagation
+counts, and can write them as JSON to compare with a previous run:
+
+    python benchmark.py --output before.json
+    python benchmark.py --baseline before.json --output after.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import solution
+import stats
+import transposition
+
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpora')
+TIERS = ('easy', 'hard', 'diagonal', 'unsolvable')
+ENGINES = ('bitboard', 'dlx')
+GENERATED_PUZZLES = 100
+
+
+def load_corpus(tier):
+    """Return the grids of a tier, or of a file if tier is a path.
+
+    The tiers generated-easy, generated-medium, generated-hard and generated-expert
+    (or generated, for any difficulty) are GENERATED_PUZZLES fresh puzzles from
+    generator.py, the same ones on every run.
+    """
+    name, _, difficulty = tier.partition('-')
+    if name == 'generated':
+        import generator
+        return [grid for grid, _ in generator.puzzles(GENERATED_PUZZLES, difficulty or None, seed=0)]
+    path = tier if os.path.exists(tier) else os.path.join(CORPORA_DIR, tier + '.txt')
+    with open(path) as puzzles:
+        return [line.strip() for line in puzzles if line.strip() and not line.startswith('#')]
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(percent / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_tier(engine, grids, repeat=1, table=False):
+    """Solve every grid with engine and measure it.
+
+    The grids are timed repeat times without any instrumentation, then solved once
+    more with stats.SolverStats and tracemalloc to count work and peak memory.
+
+    Args:
+        table(bool): give every solve a fresh transposition.TranspositionTable, and
+            measure how often its failed boards and nogoods pruned the search.
+    Returns:
+        A dictionary of the measurements.
+    """
+    tables = []
+
+    def solve(grid, **kwargs):
+        if table:
+            kwargs['table'] = transposition.TranspositionTable()
+            tables.append(kwargs['table'])
+        return solution.solve(grid, engine=engine, **kwargs)
+
+    latencies = []
+    solved = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for grid in grids:
+            begin = time.perf_counter()
+            if solve(grid):
+                solved += 1
+            latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    counters = stats.SolverStats()
+    del tables[:]
+    tracemalloc.start()
+    try:
+        for grid in grids:
+            solve(grid, stats=counters)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    latencies.sort()
+    measurements = {
+        'puzzles': len(grids),
+        'solved': solved // repeat,
+        'solves_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p90_ms': percentile(latencies, 90) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        'peak_kib': peak / 1024.0,
+        'nodes': counters.nodes,
+        'backtracks': counters.backtracks,
+        'max_depth': counters.max_depth,
+        'propagations': counters.propagations,
+    }
+    if table:
+        lookups = sum(used.lookups for used in tables)
+        measurements['table'] = {
+            'lookups': lookups,
+            'hit_rate': sum(used.hits for used in tables) / float(lookups) if lookups else 0.0,
+            'nogoods_learned': sum(used.nogoods_learned for used in tables),
+            'nogood_hits': sum(used.nogood_hits for used in tables),
+        }
+    return measurements
+
+
+def run(engines=ENGINES, tiers=TIERS, repeat=1, report=None, table=False):
+    """Benchmark every engine on every tier.
+
+    Args:
+        report: optional callable called with (engine, tier, measurements) as each
+            tier finishes.
+        table(bool): solve with transposition tables, as in run_tier().
+    Returns:
+        The results document: {'meta': {...}, 'results': {engine: {tier: {...}}}}.
+    """
+    results = {}
+    for engine in engines:
+        results[engine] = {}
+        for tier in tiers:
+            measurements = run_tier(engine, load_corpus(tier), repeat, table)
+            results[engine][tier] = measurements
+            if report is not None:
+                report(engine, tier, measurements)
+    meta = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'table': table,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(current, baseline, threshold=0.10):
+    """Find the measurements that got worse than the baseline by more than threshold.
+
+    Throughput regresses when it drops, latency when p50 or p99 grows.
+
+    Returns:
+        A list of (engine, tier, metric, baseline value, current value) tuples.
+    """
+    regressions = []
+    for engine, tiers in current['results'].items():
+        for tier, now in tiers.items():
+            before = baseline['results'].get(engine, {}).get(tier)
+            if before is None:
+                continue
+            if now['solves_per_sec'] < before['solves_per_sec'] * (1 - threshold):
+                regressions.append((engine, tier, 'solves_per_sec', before['solves_per_sec'], now['solves_per_sec']))
+            for metric in ('p50_ms', 'p99_ms'):
+                if now[metric] > before[metric] * (1 + threshold):
+                    regressions.append((engine, tier, metric, before[metric], now[metric]))
+    return regressions
+
+
+def print_row(engine, tier, m):
+    print('{:9} {:11} {:5}/{:<5} {:9.1f}/s  p50 {:8.3f}ms  p99 {:8.3f}ms  peak {:8.1f}KiB  '
+          'nodes {:7}  propagations {:8}'.format(engine, tier, m['solved'], m['puzzles'], m['solves_per_sec'],
+                                                 m['p50_ms'], m['p99_ms'], m['peak_kib'], m['nodes'],
+                                                 m['propagations']))
+    if 'table' in m:
+        print('{:9} {:11} table hit rate {:.3f}  nogoods learned {}  nogood hits {}'.format(
+            '', '', m['table']['hit_rate'], m['table']['nogoods_learned'], m['table']['nogood_hits']))
+    sys.stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Sudoku solver engines.')
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), help='engines passed to solve()')
+    parser.add_argument('--tiers', nargs='+', default=list(TIERS), help='corpus tiers or puzzle files')
+    parser.add_argument('--repeat', type=int, default=1, help='timing passes over each tier')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative slowdown flagged as regression')
+    parser.add_argument('--table', action='store_true', help='solve with transposition tables (bitboard engine only)')
+    args = parser.parse_args(argv)
+
+    results = run(args.engines, args.tiers, args.repeat, print_row, args.table)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as previous:
+        regressions = compare(results, json.load(previous), args.threshold)
+    for engine, tier, metric, before, now in regressions:
+        print('REGRESSION {} {} {}: {:.3f} -> {:.3f}'.format(engine, tier, metric, before, now))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import benchmark
+import unittest
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_corpora(self):
+        for tier in benchmark.TIERS:
+            grids = benchmark.load_corpus(tier)
+            self.assertTrue(grids)
+            self.assertTrue(all(len(grid) == 81 for grid in grids))
+
+    def test_run_tier(self):
+        measurements = benchmark.run_tier('bitboard', benchmark.load_corpus('easy')[:3])
+        self.assertEqual(measurements['puzzles'], 3)
+        self.assertEqual(measurements['solved'], 3)
+        self.assertEqual(measurements['nodes'], 3)
+        self.assertTrue(measurements['solves_per_sec'] > 0)
+        measurements = benchmark.run_tier('bitboard', benchmark.load_corpus('unsolvable')[:2])
+        self.assertEqual(measurements['solved'], 0)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([], 50), 0.0)
+
+    def test_compare(self):
+        before = {'results': {'bitboard': {'easy': {'solves_per_sec': 100.0, 'p50_ms': 1.0, 'p99_ms': 2.0}}}}
+        after = {'results': {'bitboard': {'easy': {'solves_per_sec': 80.0, 'p50_ms': 1.05, 'p99_ms': 3.0}}}}
+        regressions = benchmark.compare(after, before, threshold=0.10)
+        self.assertEqual([metric for _, _, metric, _, _ in regressions], ['solves_per_sec', 'p99_ms'])
+        self.assertEqual(benchmark.compare(before, before), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,436 @@
+"""Bitmask board engine for the diagonal Sudoku solver.
+
+A board is a flat list of integers, one per box in the same order as
+``solution.boxes`` (A1, A2, ..., I9). Bit ``d - 1`` of an entry is set while
+digit ``d`` is still a candidate for that box, so an empty box is ``FULL`` and
+a solved box has exactly one bit set. Units and peers are precomputed as
+tuples of indexes, so the hot loops only do integer masking and list indexing.
+
+The shape of the board comes from a topology.Topology. Every function takes an
+optional topology and defaults to the standard 9 x 9 diagonal board, whose
+tables are also exposed as the module constants below.
+"""
+import time
+
+import topology as topologies
+import tracing
+
+STANDARD = topologies.get(3, True)
+
+# Module constants for the standard board, read from STANDARD on first use so that
+# importing this module does not build its tables.
+CONSTANTS = {
+    'FULL': 'full',
+    'DIGITS': 'digits',
+    'boxes': 'names',
+    'BOX_INDEX': 'index',
+    'UNITS': 'units',
+    'PEERS': 'peers',
+    'CELL_UNITS': 'cell_units',
+    # Lookup tables indexed by candidate mask.
+    'BIT_COUNT': 'bit_count',
+    'MASK_DIGITS': 'mask_digits',
+    'DIGIT_MASK': 'digit_mask',
+    'SINGLE_BITS': 'single_bits',
+}
+
+# The public names, listed so that ``from bitboard import *`` exports the constants too.
+__all__ = ['STANDARD', 'CONSTANTS'] + list(CONSTANTS) + [
+    'grid_board', 'values_board', 'board_values', 'eliminate', 'only_choice', 'naked_twins', 'candidate_count',
+    'unit_only_choice', 'unit_naked_twins', 'propagate', 'reduce_puzzle', 'record_changes', 'choose_cell',
+    'search', 'count_solutions', 'solve']
+
+
+def __getattr__(name):
+    if name in CONSTANTS:
+        return getattr(STANDARD, CONSTANTS[name])
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def grid_board(grid, topology=STANDARD):
+    """Convert a grid string into a board, using the full mask for empty boxes.
+
+    Args:
+        grid(string): Sudoku grid in string form, one character per box.
+        topology(topology.Topology): shape of the board.
+    Returns:
+        The board as a list of candidate masks.
+    """
+    digit_mask, full = topology.digit_mask, topology.full
+    board = [digit_mask.get(c, full) for c in grid if c == '.' or c in digit_mask]
+    assert len(board) == topology.cells
+    return board
+
+
+def values_board(values, topology=STANDARD):
+    """Convert a Sudoku in dictionary form into a board."""
+    board = []
+    for box in topology.names:
+        mask = 0
+        for d in values[box]:
+            mask |= topology.digit_mask[d]
+        board.append(mask)
+    return board
+
+
+def board_values(board, topology=STANDARD):
+    """Convert a board back into the {<box>: <value>} dictionary form."""
+    mask_digits = topology.mask_digits
+    return dict(zip(topology.names, [mask_digits[mask] for mask in board]))
+
+
+def eliminate(board, topology=STANDARD):
+    """Remove the digit of every solved box from all of its peers.
+
+    Input: A board.
+    Output: The board after the elimination, or False if a box runs out of candidates.
+    """
+    bit_count, peers = topology.bit_count, topology.peers
+    for i, mask in enumerate(board):
+        if bit_count[mask] == 1:
+            clear = ~mask
+            for p in peers[i]:
+                if board[p] & mask:
+                    board[p] &= clear
+                    if not board[p]:
+                        return False
+    return board
+
+
+def only_choice(board, topology=STANDARD):
+    """Assign every digit that fits in only one box of a unit.
+
+    Input: A board.
+    Output: The board after filling in only choices, or False if a unit cannot place a digit.
+    """
+    for unit in topology.units:
+        if unit_only_choice(board, unit, [], topology) is False:
+            return False
+    return board
+
+
+def naked_twins(board, topology=STANDARD):
+    """Eliminate the digits of every pair of identical two-candidate boxes from the rest of their unit.
+
+    Input: A board.
+    Output: The board after removing the naked twins digits.
+    """
+    for unit in topology.units:
+        unit_naked_twins(board, unit, [], topology)
+    return board
+
+
+def candidate_count(board, topology=STANDARD):
+    """Return the total number of candidates left on a board."""
+    bit_count = topology.bit_count
+    return sum(bit_count[mask] for mask in board)
+
+
+def unit_only_choice(board, unit, changed, topology=STANDARD):
+    """Apply only_choice to a single unit.
+
+    Input: A board, the unit to check and a list that receives the boxes that change.
+    Output: The board, or False if the unit cannot place a digit.
+    """
+    once = twice = 0
+    for c in unit:
+        mask = board[c]
+        twice |= once & mask
+        once |= mask
+    if once != topology.full:
+        return False
+    singles = once & ~twice
+    if singles:
+        bit_count = topology.bit_count
+        for c in unit:
+            mask = board[c] & singles
+            if mask and board[c] != mask:
+                if bit_count[mask] > 1:
+                    return False
+                board[c] = mask
+                changed.append(c)
+    return board
+
+
+def unit_naked_twins(board, unit, changed, topology=STANDARD):
+    """Apply naked_twins to a single unit.
+
+    Input: A board, the unit to check and a list that receives the boxes that change.
+    Output: The board, or False if a box runs out of candidates.
+    """
+    bit_count = topology.bit_count
+    pairs = None
+    for c in unit:
+        mask = board[c]
+        if bit_count[mask] == 2:
+            if pairs is None:
+                pairs = {}
+            if mask in pairs:
+                clear = ~mask
+                twin = pairs[mask]
+                for other in unit:
+                    if other != c and other != twin and board[other] & mask:
+                        board[other] &= clear
+                        if not board[other]:
+                            return False
+                        changed.append(other)
+            else:
+                pairs[mask] = c
+    return board
+
+
+def _profiled(stats, name, strategy, board, unit, changed, topology):
+    """Run a unit strategy, adding its time and eliminations to stats."""
+    bit_count = topology.bit_count
+    before = sum(bit_count[board[c]] for c in unit)
+    start = time.perf_counter()
+    result = strategy(board, unit, changed, topology)
+    stats.strategy(name, time.perf_counter() - start, before - sum(bit_count[board[c]] for c in unit))
+    return result
+
+
+def propagate(board, changed, stats=None, topology=STANDARD):
+    """Propagate the consequences of the given changed boxes until nothing else changes.
+
+    Only the peers of boxes that became solved and the units containing a changed
+    box are re-examined, so the work grows with the number of changes instead of
+    the board size. Reaches the same board as the full sweeps in reduce_puzzle.
+
+    Input: A board, an iterable of the indexes of the boxes that changed and an
+        optional stats.SolverStats that receives the time and eliminations of
+        each strategy.
+    Output: The reduced board, or False as soon as a contradiction is found.
+    """
+    bit_count, peers, cell_units, units = topology.bit_count, topology.peers, topology.cell_units, topology.units
+    stack = list(changed)
+    pending = [False] * len(board)
+    for c in stack:
+        pending[c] = True
+    dirty = set()
+    found = []
+    while True:
+        if stats is not None:
+            candidates = candidate_count(board, topology)
+            start = time.perf_counter()
+        while stack:
+            c = stack.pop()
+            pending[c] = False
+            mask = board[c]
+            if bit_count[mask] == 1:
+                clear = ~mask
+                for p in peers[c]:
+                    if board[p] & mask:
+                        board[p] &= clear
+                        if not board[p]:
+                            return False
+                        if not pending[p]:
+                            pending[p] = True
+                            stack.append(p)
+            dirty.update(cell_units[c])
+        if stats is not None:
+            stats.strategy('eliminate', time.perf_counter() - start, candidates - candidate_count(board, topology))
+        if not dirty:
+            return board
+        unit = units[dirty.pop()]
+        if stats is None:
+            if unit_only_choice(board, unit, found, topology) is False or \
+                    unit_naked_twins(board, unit, found, topology) is False:
+                return False
+        elif _profiled(stats, 'only_choice', unit_only_choice, board, unit, found, topology) is False or \
+                _profiled(stats, 'naked_twins', unit_naked_twins, board, unit, found, topology) is False:
+            return False
+        for c in found:
+            if not pending[c]:
+                pending[c] = True
+                stack.append(c)
+        del found[:]
+
+
+def reduce_puzzle(board, incremental=True, topology=STANDARD):
+    """Apply eliminate, only_choice and naked_twins until the board stops changing.
+
+    Input: A board. With incremental=False the three strategies are swept over the
+        whole board on every round instead of being driven by propagate().
+    Output: The reduced board, or False if a contradiction was found.
+    """
+    if incremental:
+        return propagate(board, range(len(board)), topology=topology)
+    while True:
+        before = board[:]
+        if eliminate(board, topology) is False or only_choice(board, topology) is False:
+            return False
+        naked_twins(board, topology)
+        if 0 in board:
+            return False
+        if board == before:
+            return board
+
+
+def record_changes(recorder, before, after, topology=STANDARD):
+    """Record every box that differs between two boards as a tracing delta."""
+    mask_digits = topology.mask_digits
+    for i, mask in enumerate(after):
+        if mask != before[i]:
+            recorder.record(topology.names[i], mask_digits[before[i]], mask_digits[mask])
+
+
+def choose_cell(board, topology=STANDARD):
+    """Return the index of the unsolved box with the fewest candidates, or None if all are solved."""
+    bit_count = topology.bit_count
+    best, cell = topology.size + 1, None
+    for i, mask in enumerate(board):
+        n = bit_count[mask]
+        if 1 < n < best:
+            best, cell = n, i
+            if n == 2:
+                break
+    return cell
+
+
+def search(board, changed=None, stats=None, depth=0, topology=STANDARD, cancelled=None, table=None):
+    """Depth-first search with propagation, branching on the box with fewest candidates.
+
+    The search keeps its own stack of partially explored boards instead of recursing,
+    so its depth is not bounded by the Python recursion limit.
+
+    Input: A board, when it is a branch of an already reduced board the indexes of the
+        boxes that changed (without them the whole board is reduced first), an
+        optional stats.SolverStats to count the work in, the depth of the board
+        in the search tree, an optional function, called once per node, that
+        returns True to abandon the search, such as a budget.Budget, and an optional
+        transposition.TranspositionTable, built for the same topology, that remembers
+        dead ends.
+    Output: The solved board, or False if there is no solution or the search was abandoned.
+    """
+    recorder = tracing.active()
+    # One [reduced board, branching cell, candidates left to try, depth, recorder mark,
+    # bit being tried, (key, reduced key)] frame for every board between the root and
+    # the current one. The keys are only set with a table.
+    stack = []
+    keys = None
+    if table is not None:
+        if table.topology is not topology:
+            raise ValueError('The transposition table was built for another topology')
+        key = table.board_key(board)
+        table.start(key)
+    while True:
+        if cancelled is not None and cancelled():
+            return False
+        if recorder is not None:
+            before = board[:]
+        if stats is not None:
+            stats.nodes += 1
+            candidates = candidate_count(board, topology)
+        if table is not None and table.failed(key):
+            board = False
+        else:
+            board = propagate(board, range(len(board)) if changed is None else changed, stats, topology)
+            if table is not None:
+                if board is not False:
+                    board = table.prune(board)
+                if board is False:
+                    table.store(key)
+                    if stack:
+                        table.learn(stack[0][0], [(frame[1], frame[5]) for frame in stack])
+                else:
+                    keys = (key, table.board_key(board))
+                    if table.failed(keys[1]):
+                        table.store(key)
+                        board = False
+        if board is not False:
+            if stats is not None:
+                stats.propagations += candidates - candidate_count(board, topology)
+            if recorder is not None:
+                record_changes(recorder, before, board, topology)
+            cell = choose_cell(board, topology)
+            if cell is None:
+                return board
+            mask = board[cell]
+            stack.append([board, cell, [bit for bit in reversed(topology.single_bits) if mask & bit], depth, None,
+                          None, keys])
+        else:
+            if stats is not None:
+                stats.contradiction(depth)
+            # Backtrack to the deepest board that still has a candidate to try.
+            while stack:
+                frame = stack[-1]
+                if stats is not None:
+                    stats.backtracks += 1
+                if recorder is not None:
+                    recorder.rewind(frame[4])
+                if frame[2]:
+                    break
+                stack.pop()
+                if table is not None:
+                    table.store(frame[6][0])
+                    table.store(frame[6][1])
+            else:
+                return False
+        frame = stack[-1]
+        parent, cell, bits, depth = frame[:4]
+        bit = frame[5] = bits.pop()
+        board = parent[:]
+        board[cell] = bit
+        changed = (cell,)
+        depth += 1
+        if table is not None:
+            key = frame[6][1] ^ table.cell_key(cell, parent[cell]) ^ table.cell_key(cell, bit)
+        if recorder is not None:
+            frame[4] = recorder.mark()
+            recorder.record(topology.names[cell], topology.mask_digits[parent[cell]], topology.mask_digits[bit])
+        if stats is not None:
+            stats.branch(topology.names[cell], topology.mask_digits[bit], depth)
+
+
+def count_solutions(board, limit=2, changed=None, topology=STANDARD):
+    """Count the solutions of a board, stopping as soon as limit of them are found.
+
+    Every branch starts from its parent's reduced board, so sibling branches share
+    the propagation done above them instead of repeating it.
+
+    Input: A board, the number of solutions to stop at (None counts all of them) and,
+        as in search(), the boxes that changed if it is a branch of a reduced board.
+    Output: The number of solutions found, at most limit.
+    """
+    if changed is None:
+        board = reduce_puzzle(board, topology=topology)
+    else:
+        board = propagate(board, changed, topology=topology)
+    if board is False:
+        return 0
+    cell = choose_cell(board, topology)
+    if cell is None:
+        return 1
+    count = 0
+    mask = board[cell]
+    for bit in topology.single_bits:
+        if mask & bit:
+            child = board[:]
+            child[cell] = bit
+            count += count_solutions(child, None if limit is None else limit - count, (cell,), topology)
+            if limit is not None and count >= limit:
+                break
+    return count
+
+
+def solve(grid, stats=None, topology=STANDARD, budget=None, table=None):
+    """Find the solution to a Sudoku grid using the bitmask engine.
+
+    Args:
+        grid(string): a string representing a sudoku grid.
+        stats(stats.SolverStats): optional counters to fill in.
+        topology(topology.Topology): shape of the board, the standard diagonal 9 x 9 by default.
+        budget(budget.Budget): optional limits to stop the search at.
+        table(transposition.TranspositionTable): optional memory of dead ends for the search.
+    Returns:
+        The dictionary representation of the final sudoku grid. False if no solution exists
+        or the budget ran out.
+    """
+    board = grid_board(grid, topology)
+    recorder = tracing.active()
+    if recorder is not None:
+        recorder.start(board_values(board, topology))
+    board = search(board, stats=stats, topology=topology, cancelled=budget, table=table)
+    if board is False:
+        return False
+    return board_values(board, topology)
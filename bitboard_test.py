@@ -0,0 +1,41 @@
+import bitboard
+import solution
+import solution_test
+import unittest
+
+
+class TestBitboard(unittest.TestCase):
+
+    def test_values_round_trip(self):
+        values = solution_test.TestNakedTwins.before_naked_twins_1
+        self.assertEqual(bitboard.board_values(bitboard.values_board(values)), values)
+
+    def test_grid_board(self):
+        board = bitboard.grid_board(solution_test.TestDiagonalSudoku.diagonal_grid)
+        self.assertEqual(board[0], 0b10)
+        self.assertEqual(board[1], bitboard.FULL)
+
+    def test_solve(self):
+        self.assertEqual(bitboard.solve(solution_test.TestDiagonalSudoku.diagonal_grid), solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_incremental_matches_sweep(self):
+        grid = solution_test.TestDiagonalSudoku.diagonal_grid
+        incremental = bitboard.reduce_puzzle(bitboard.grid_board(grid))
+        self.assertEqual(incremental, bitboard.reduce_puzzle(bitboard.grid_board(grid), incremental=False))
+        cell = incremental.index(max(incremental, key=lambda mask: bitboard.BIT_COUNT[mask]))
+        for bit in bitboard.SINGLE_BITS:
+            if incremental[cell] & bit:
+                child = incremental[:]
+                child[cell] = bit
+                swept = bitboard.reduce_puzzle(child[:], incremental=False)
+                self.assertEqual(bitboard.propagate(child, [cell]), swept)
+
+    def test_matches_dict_engine(self):
+        grid = '..269...8...8...............6...1..7....4...........42.7.....2.6.3.849..9........'
+        self.assertEqual(solution.solve(grid), solution.solve(grid, engine='dict'))
+
+    def test_unsolvable(self):
+        self.assertFalse(bitboard.solve('11' + '.' * 79))
+
+if __name__ == '__main__':
+    unittest.main()
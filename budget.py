@@ -0,0 +1,89 @@
+"""Limits on the work a single solve may do.
+
+solution.solve() accepts a timeout, a maximum number of search nodes and a
+CancellationToken. The engines check the resulting Budget once per search
+node, so a pathological or unsolvable grid stops within one node of running
+out. Such a solve returns an Exhausted result instead of a solution: it is
+falsy like the False returned for an unsolvable grid, and carries the reduced
+board and the work done so far.
+"""
+import time
+
+
+class CancellationToken(object):
+    """Stops the solves it was passed to, from another thread or a hook.
+
+    A token can be shared by several solves, and stays cancelled once cancelled.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Budget(object):
+    """Time, node and cancellation limits of one solve, starting when it is created.
+
+    Calling a budget counts one search node and returns True once the budget is
+    exhausted, so it can be passed as the cancelled argument of the engines' search.
+
+    Args:
+        timeout(float): seconds the solve may run for.
+        max_nodes(int): search nodes the solve may visit.
+        token(CancellationToken): token that cancels the solve.
+    Attributes:
+        nodes: search nodes visited so far, counting the node that exhausted the budget.
+        reason: None while within budget, then 'timeout', 'nodes' or 'cancelled'.
+    """
+
+    def __init__(self, timeout=None, max_nodes=None, token=None):
+        self.start = time.monotonic()
+        self.deadline = None if timeout is None else self.start + timeout
+        self.max_nodes = max_nodes
+        self.token = token
+        self.nodes = 0
+        self.reason = None
+
+    def __call__(self):
+        if self.reason is not None:
+            return True
+        self.nodes += 1
+        if self.token is not None and self.token.cancelled:
+            self.reason = 'cancelled'
+        elif self.max_nodes is not None and self.nodes > self.max_nodes:
+            self.reason = 'nodes'
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = 'timeout'
+        return self.reason is not None
+
+    def elapsed(self):
+        """Return the seconds since the budget was created."""
+        return time.monotonic() - self.start
+
+
+class Exhausted(object):
+    """Result of a solve that ran out of budget before finding a solution.
+
+    Attributes:
+        reason: 'timeout', 'nodes' or 'cancelled'.
+        values: the grid in dictionary form after constraint propagation alone, or
+            False if propagation already shows the grid has no solution.
+        nodes: search nodes visited.
+        seconds: time spent solving.
+        stats: the stats.SolverStats passed to the solve, if any.
+    """
+
+    def __init__(self, reason, values, nodes, seconds, stats=None):
+        self.reason = reason
+        self.values = values
+        self.nodes = nodes
+        self.seconds = seconds
+        self.stats = stats
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return 'Exhausted(reason={!r}, nodes={}, seconds={:.3f})'.format(self.reason, self.nodes, self.seconds)
@@ -0,0 +1,59 @@
+import budget
+import os
+import solution
+import solution_test
+import stats
+import threading
+import unittest
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpora', 'unsolvable.txt')) as corpus:
+    # An unsolvable grid that takes 77 search nodes to refute.
+    UNSOLVABLE = [line.strip() for line in corpus if line.strip()][5]
+
+
+class TestBudget(unittest.TestCase):
+
+    def test_max_nodes(self):
+        for engine in ('bitboard', 'dict', 'dlx'):
+            solver_stats = stats.SolverStats()
+            result = solution.solve(UNSOLVABLE, engine=engine, stats=solver_stats, max_nodes=10)
+            self.assertFalse(result)
+            self.assertIsInstance(result, budget.Exhausted)
+            self.assertEqual(result.reason, 'nodes')
+            self.assertEqual(result.nodes, 11)
+            self.assertIs(result.stats, solver_stats)
+            self.assertEqual(solver_stats.nodes, 10)
+
+    def test_partial_board(self):
+        result = solution.solve(UNSOLVABLE, max_nodes=1)
+        for box, c in zip(solution.boxes, UNSOLVABLE):
+            if c != '.':
+                self.assertEqual(result.values[box], c)
+        self.assertTrue(sum(map(len, result.values.values())) < sum(map(len, solution.grid_values(UNSOLVABLE).values())))
+
+    def test_within_budget(self):
+        grid = solution_test.TestDiagonalSudoku.diagonal_grid
+        self.assertEqual(solution.solve(grid, timeout=60, max_nodes=1000), solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertIs(solution.solve(UNSOLVABLE, max_nodes=1000), False)
+
+    def test_timeout(self):
+        result = solution.solve(UNSOLVABLE, timeout=0)
+        self.assertEqual(result.reason, 'timeout')
+        self.assertEqual(result.nodes, 1)
+
+    def test_cancellation(self):
+        token = budget.CancellationToken()
+        solver_stats = stats.SolverStats(on_branch=lambda box, digit, depth: token.cancel())
+        result = solution.solve(UNSOLVABLE, engine='dict', stats=solver_stats, token=token)
+        self.assertEqual(result.reason, 'cancelled')
+        self.assertEqual(solver_stats.nodes, 1)
+
+    def test_cancel_from_thread(self):
+        token = budget.CancellationToken()
+        timer = threading.Timer(0.001, token.cancel)
+        timer.start()
+        self.assertEqual(solution.solve(UNSOLVABLE, engine='dict', token=token).reason, 'cancelled')
+        timer.join()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""Canonical-form solution cache in front of solution.solve().
+
+Many incoming grids are the same puzzle in disguise: digits relabeled, the
+board transposed or mirrored, or rows and columns shuffled in a way that keeps
+both diagonals (diag_one and diag_two) intact. canonical_form() maps every
+such variant to one representative grid, so the cache solves each puzzle
+once and maps the stored solution back through the transformation.
+
+For puzzles with several solutions a cache hit returns a valid solution of
+the grid, which is not necessarily the one solve() would have found.
+"""
+import collections
+import operator
+
+import solution
+
+SIZE = 9
+DIGITS = '123456789'
+
+
+def _line_permutations():
+    """Return the permutations of row (or column) indexes that keep bands and the board's symmetry.
+
+    Applied to rows and columns alike, such a permutation maps both diagonals onto
+    themselves: bands stay bands, and lines i and 8 - i keep mirroring each other.
+    """
+    perms = []
+    outer = [(0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0)]
+    for first in outer:
+        for middle in ((3, 4, 5), (5, 4, 3)):
+            perm = list(first) + list(middle) + [SIZE - 1 - first[2 - k] for k in range(3)]
+            perms.append(tuple(perm))
+            perms.append(tuple(SIZE - 1 - i for i in perm))
+    return perms
+
+
+def _transforms():
+    """Return every board symmetry as a tuple perm such that new_grid[j] = grid[perm[j]]."""
+    transforms = set()
+    for lines in _line_permutations():
+        for transpose in (False, True):
+            for mirror in (False, True):
+                perm = [0] * (SIZE * SIZE)
+                for r in range(SIZE):
+                    for c in range(SIZE):
+                        nr, nc = lines[r], lines[c]
+                        if transpose:
+                            nr, nc = nc, nr
+                        if mirror:
+                            nc = SIZE - 1 - nc
+                        perm[nr * SIZE + nc] = r * SIZE + c
+                transforms.add(tuple(perm))
+    return [operator.itemgetter(*perm) for perm in sorted(transforms)], sorted(transforms)
+
+
+_GETTERS, TRANSFORMS = _transforms()
+_PATTERN = str.maketrans(DIGITS, '#' * len(DIGITS))
+
+
+def _relabel_table(moved):
+    """Return the str.translate table numbering digits in order of first appearance."""
+    order = [c for c in dict.fromkeys(moved) if c != '.']
+    order += [d for d in DIGITS if d not in order]
+    return str.maketrans(''.join(order), DIGITS)
+
+
+def canonical_form(grid):
+    """Find the canonical representative of a grid among all its equivalent variants.
+
+    The representative is the variant whose pattern of filled boxes is smallest,
+    ties broken by the smallest relabeled grid. Comparing the relabeling-invariant
+    pattern first means only the tied variants need relabeling.
+
+    Args:
+        grid(string): a string representing a sudoku grid, 81 characters long.
+    Returns:
+        (canonical grid, perm, relabel) where perm is the position permutation and
+        relabel the str.translate table that produce the canonical grid:
+        canonical[j] == grid[perm[j]].translate(relabel).
+    """
+    moved = [''.join(getter(grid)) for getter in _GETTERS]
+    patterns = [variant.translate(_PATTERN) for variant in moved]
+    smallest = min(patterns)
+    best = None
+    for k, pattern in enumerate(patterns):
+        if pattern == smallest:
+            relabel = _relabel_table(moved[k])
+            candidate = moved[k].translate(relabel)
+            if best is None or candidate < best[0]:
+                best = (candidate, TRANSFORMS[k], relabel)
+    return best
+
+
+def restore(canonical_solution, perm, relabel):
+    """Map a solution of the canonical grid back to the grid canonical_form() was given."""
+    unlabel = dict((v, k) for k, v in relabel.items())
+    solved = [None] * len(perm)
+    for j, i in enumerate(perm):
+        solved[i] = canonical_solution[j]
+    return ''.join(solved).translate(unlabel)
+
+
+class SolutionCache(object):
+    """LRU cache of solutions keyed on the canonical form of the grid.
+
+    Args:
+        maxsize(int): number of canonical puzzles to keep.
+        engine(string): solver engine passed to solution.solve() on a miss.
+    """
+
+    def __init__(self, maxsize=4096, engine='bitboard'):
+        self.maxsize = maxsize
+        self.engine = engine
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def solve(self, grid):
+        """Solve a grid like solution.solve(), reusing the solution of any equivalent grid."""
+        key, perm, relabel = canonical_form(grid)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            solved = self._entries[key]
+        else:
+            self.misses += 1
+            values = solution.solve(key, engine=self.engine)
+            solved = ''.join(values[box] for box in solution.boxes) if values else False
+            self._entries[key] = solved
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        if solved is False:
+            return False
+        return dict(zip(solution.boxes, restore(solved, perm, relabel)))
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        """Return the hit/miss counters, hit rate and current size."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / float(lookups) if lookups else 0.0,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
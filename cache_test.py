@@ -0,0 +1,46 @@
+import cache
+import solution
+import solution_test
+import unittest
+
+
+def transform(grid, perm, digits):
+    return ''.join(grid[i] for i in perm).translate(str.maketrans('123456789', digits))
+
+
+class TestSolutionCache(unittest.TestCase):
+    grid = solution_test.TestDiagonalSudoku.diagonal_grid
+
+    def test_transforms_keep_diagonals(self):
+        diagonals = set(frozenset(solution.boxes.index(box) for box in diagonal) for diagonal in solution.diagonals)
+        self.assertEqual(len(cache.TRANSFORMS), 96)
+        for perm in cache.TRANSFORMS:
+            moved = set(frozenset(perm.index(i) for i in diagonal) for diagonal in diagonals)
+            self.assertEqual(moved, diagonals)
+
+    def test_canonical_form_is_shared(self):
+        key = cache.canonical_form(self.grid)[0]
+        for k, perm in enumerate(cache.TRANSFORMS[::7]):
+            variant = transform(self.grid, perm, '987654321' if k % 2 else '123456789')
+            self.assertEqual(cache.canonical_form(variant)[0], key)
+
+    def test_solutions_map_back(self):
+        solutions = cache.SolutionCache()
+        for perm in cache.TRANSFORMS[::11]:
+            variant = transform(self.grid, perm, '361872954')
+            self.assertEqual(solutions.solve(variant), solution.solve(variant))
+        stats = solutions.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], len(cache.TRANSFORMS[::11]) - 1)
+
+    def test_lru_eviction(self):
+        solutions = cache.SolutionCache(maxsize=1)
+        unsolvable = '11' + '.' * 79
+        self.assertFalse(solutions.solve(unsolvable))
+        solutions.solve(self.grid)
+        self.assertFalse(solutions.solve(unsolvable))
+        self.assertEqual(solutions.stats()['misses'], 3)
+        self.assertEqual(len(solutions), 1)
+
+if __name__ == '__main__':
+    unittest.main()
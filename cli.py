@@ -0,0 +1,140 @@
+"""Command line mode of solution.py: solve a stream of grids, one per line.
+
+    python solution.py puzzles.txt --workers 4 > solved.txt
+    python solution.py - < puzzles.txt
+
+Every non-empty input line holds one 81 character grid ('#' starts a comment).
+The input may also be a packed.py file of grids or boards, numbered by record
+from 1; boards can only be solved by the bitboard engine. Pipes and other
+non-regular files are always read as text.
+For every grid a line ``<line number>\\t<solution or 'unsolvable'>\\t<ms>`` is
+written as soon as it is solved, and a summary of throughput, failures and
+p50/p99 latency is written to stderr at the end. Input is read lazily and
+latencies go into a fixed-size histogram, so memory use does not grow with
+the length of the input.
+"""
+import argparse
+import collections
+import math
+import os
+import sys
+import time
+
+import batch
+import packed
+import solution
+
+
+class LatencyHistogram(object):
+    """Log-bucketed latency histogram, accurate to about 1% at any percentile."""
+
+    GROWTH = 1.02
+    RESOLUTION = 1e-7
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.total = 0
+
+    def add(self, seconds):
+        bucket = int(math.log(max(seconds, self.RESOLUTION) / self.RESOLUTION, self.GROWTH))
+        self.counts[bucket] += 1
+        self.total += 1
+
+    def percentile(self, percent):
+        """Return the latency in seconds below which percent of the samples fall."""
+        if not self.total:
+            return 0.0
+        rank = percent / 100.0 * self.total
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                break
+        return self.RESOLUTION * self.GROWTH ** (bucket + 0.5)
+
+
+def read_grids(lines, errors, counts):
+    """Yield (line number, grid) for every valid grid line.
+
+    Invalid lines are reported to the errors stream and counted in counts['invalid'].
+    """
+    for number, line in enumerate(lines, 1):
+        grid = line.strip()
+        if not grid or grid.startswith('#'):
+            continue
+        if len(grid) != 81 or not solution.GRID_CHARS.issuperset(grid):
+            errors.write('line {}: invalid grid\n'.format(number))
+            counts['invalid'] += 1
+            continue
+        yield number, grid
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='solution.py', description='Solve diagonal Sudoku grids, one per line.')
+    parser.add_argument('input', help="file with one grid per line, a packed file, or '-' for stdin")
+    parser.add_argument('-o', '--output', help='write solutions to this file instead of stdout')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='worker processes (default: 1)')
+    parser.add_argument('--chunksize', type=int, default=64, help='grids handed to a worker at a time')
+    parser.add_argument('--engine', default='bitboard', help='solver engine passed to solve()')
+    parser.add_argument('--unordered', action='store_true', help='write solutions in completion order')
+    return parser.parse_args(argv)
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    """Run the command line mode and return the process exit status."""
+    args = parse_args(argv)
+    stdin = stdin or sys.stdin
+    stderr = stderr or sys.stderr
+    if args.input == '-':
+        source = stdin
+    elif os.path.isfile(args.input) and packed.is_packed(args.input):
+        source = packed.Reader(args.input)
+        if source.kind == packed.BOARDS and args.engine != 'bitboard':
+            source.close()
+            stderr.write('solution.py: error: {}: board records can only be solved by the bitboard engine\n'.format(
+                args.input))
+            return 2
+    else:
+        source = open(args.input)
+    sink = open(args.output, 'w') if args.output else (stdout or sys.stdout)
+    histogram = LatencyHistogram()
+    counts = collections.Counter()
+    start = time.perf_counter()
+    try:
+        if isinstance(source, packed.Reader):
+            numbered = enumerate(source.grids() if source.kind == packed.GRIDS else source.boards(), 1)
+        else:
+            numbered = read_grids(source, stderr, counts)
+        line_numbers = {}
+
+        def grids():
+            # Remember the line number of each grid until its result comes back.
+            for index, (number, grid) in enumerate(numbered):
+                line_numbers[index] = number
+                yield grid
+
+        results = batch.iter_solve(grids(), args.workers, args.chunksize, not args.unordered, args.engine, timed=True)
+        for index, values, seconds in results:
+            histogram.add(seconds)
+            if values:
+                counts['solved'] += 1
+                text = ''.join(values[box] for box in solution.boxes)
+            else:
+                counts['unsolvable'] += 1
+                text = 'unsolvable'
+            sink.write('{}\t{}\t{:.3f}\n'.format(line_numbers.pop(index), text, seconds * 1000))
+    finally:
+        if source is not stdin:
+            source.close()
+        if args.output:
+            sink.close()
+        else:
+            sink.flush()
+    elapsed = time.perf_counter() - start
+    total = counts['solved'] + counts['unsolvable']
+    stderr.write('puzzles: {}  solved: {}  unsolvable: {}  invalid: {}\n'.format(
+        total, counts['solved'], counts['unsolvable'], counts['invalid']))
+    stderr.write('elapsed: {:.3f}s  throughput: {:.1f} puzzles/s\n'.format(elapsed, total / elapsed if elapsed else 0.0))
+    stderr.write('latency p50: {:.3f}ms  p99: {:.3f}ms\n'.format(histogram.percentile(50) * 1000,
+                                                                 histogram.percentile(99) * 1000))
+    return 0 if total == counts['solved'] and not counts['invalid'] else 1
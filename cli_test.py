@@ -0,0 +1,86 @@
+import bitboard
+import cli
+import io
+import os
+import packed
+import shutil
+import solution
+import solution_test
+import tempfile
+import unittest
+
+
+class TestCommandLine(unittest.TestCase):
+    grid = solution_test.TestDiagonalSudoku.diagonal_grid
+
+    def run_main(self, text, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = cli.main(['-'] + list(args), io.StringIO(text), stdout, stderr)
+        return status, stdout.getvalue().splitlines(), stderr.getvalue()
+
+    def test_streams_solutions(self):
+        expected = ''.join(solution_test.TestDiagonalSudoku.solved_diag_sudoku[box] for box in solution.boxes)
+        status, lines, summary = self.run_main('# comment\n{0}\n\n{0}\n'.format(self.grid))
+        self.assertEqual(status, 0)
+        self.assertEqual([line.split('\t')[:2] for line in lines], [['2', expected], ['4', expected]])
+        self.assertIn('puzzles: 2  solved: 2  unsolvable: 0  invalid: 0', summary)
+
+    def test_failures(self):
+        status, lines, summary = self.run_main('11' + '.' * 79 + '\nnot a grid\n', '--workers', '2')
+        self.assertEqual(status, 1)
+        self.assertEqual(lines[0].split('\t')[:2], ['1', 'unsolvable'])
+        self.assertIn('line 2: invalid grid', summary)
+        self.assertIn('unsolvable: 1  invalid: 1', summary)
+
+    def test_packed_input(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'puzzles.sdkp')
+            packed.write(path, [self.grid, '11' + '.' * 79])
+            stdout, stderr = io.StringIO(), io.StringIO()
+            status = cli.main([path], stdout=stdout, stderr=stderr)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(status, 1)
+        self.assertEqual([line.split('\t')[0] for line in stdout.getvalue().splitlines()], ['1', '2'])
+        self.assertIn('puzzles: 2  solved: 1  unsolvable: 1', stderr.getvalue())
+
+    def test_packed_boards(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'puzzles.sdkp')
+            packed.write(path, [bitboard.grid_board(self.grid), bitboard.grid_board('11' + '.' * 79)], packed.BOARDS)
+            stdout, stderr = io.StringIO(), io.StringIO()
+            status = cli.main([path, '--workers', '2'], stdout=stdout, stderr=stderr)
+            self.assertEqual(status, 1)
+            self.assertEqual([line.split('\t')[0] for line in stdout.getvalue().splitlines()], ['1', '2'])
+            self.assertIn('puzzles: 2  solved: 1  unsolvable: 1', stderr.getvalue())
+            stderr = io.StringIO()
+            self.assertEqual(cli.main([path, '--engine', 'dict'], stdout=io.StringIO(), stderr=stderr), 2)
+            self.assertIn('only be solved by the bitboard engine', stderr.getvalue())
+        finally:
+            shutil.rmtree(directory)
+
+    @unittest.skipUnless(os.path.isdir('/dev/fd'), 'needs /dev/fd')
+    def test_pipe_input(self):
+        # Checking a pipe for the packed header would consume the start of the first grid.
+        read, write = os.pipe()
+        with os.fdopen(write, 'w') as stream:
+            stream.write(self.grid + '\n')
+        stdout, stderr = io.StringIO(), io.StringIO()
+        try:
+            status = cli.main(['/dev/fd/{}'.format(read)], stdout=stdout, stderr=stderr)
+        finally:
+            os.close(read)
+        self.assertEqual(status, 0)
+        self.assertIn('puzzles: 1  solved: 1', stderr.getvalue())
+
+    def test_histogram(self):
+        histogram = cli.LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.add(ms / 1000.0)
+        self.assertAlmostEqual(histogram.percentile(50), 0.050, delta=0.001)
+        self.assertAlmostEqual(histogram.percentile(99), 0.099, delta=0.002)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,265 @@
+"""Dancing Links (Algorithm X) engine for the diagonal Sudoku solver.
+
+The puzzle is modelled as an exact cover problem. There is one matrix row per
+(box, digit) candidate and one column per constraint: every box holds exactly
+one digit, and every unit of the topology (rows, columns, squares and both
+diagonals) holds every digit exactly once. The matrix is built once per
+topology as flat lists of node links and copied for each solve; the search then
+only relinks nodes, so it never copies a board when it branches.
+
+Run ``python dlx.py [puzzles.txt]`` to compare it with the bitboard engine.
+"""
+import bitboard
+import tracing
+
+# Link lists of the full matrix of each topology, built on first use.
+_templates = {}
+
+
+def _build_template(topology):
+    """Build the link lists of the full exact cover matrix for an empty grid."""
+    columns = topology.cells + len(topology.units) * topology.size
+    left = [columns] + list(range(columns))
+    right = list(range(1, columns + 1)) + [0]
+    up = list(range(columns + 1))
+    down = list(range(columns + 1))
+    column = list(range(columns + 1))
+    size = [0] * (columns + 1)
+    row_of = [-1] * (columns + 1)
+    row_start = []
+    for cell, units in enumerate(topology.cell_units):
+        for digit in range(topology.size):
+            cols = [1 + cell] + [1 + topology.cells + u * topology.size + digit for u in units]
+            first = len(left)
+            row_start.append(first)
+            for col in cols:
+                node = len(left)
+                column.append(col)
+                row_of.append(len(row_start) - 1)
+                up.append(up[col])
+                down.append(col)
+                down[up[col]] = node
+                up[col] = node
+                size[col] += 1
+                if node == first:
+                    left.append(node)
+                    right.append(node)
+                else:
+                    left.append(left[first])
+                    right.append(first)
+                    right[left[first]] = node
+                    left[first] = node
+    return left, right, up, down, column, size, row_of, row_start
+
+
+class DancingLinks(object):
+    """One exact cover matrix, covered as the givens and search decisions require."""
+
+    def __init__(self, stats=None, topology=bitboard.STANDARD, cancelled=None):
+        if topology not in _templates:
+            _templates[topology] = _build_template(topology)
+        left, right, up, down, column, size, self.row_of, self.row_start = _templates[topology]
+        self.topology = topology
+        self.left = left[:]
+        self.right = right[:]
+        self.up = up[:]
+        self.down = down[:]
+        self.column = column
+        self.size = size[:]
+        self.covered = [False] * len(size)
+        self.stats = stats
+        self.cancelled = cancelled
+        self.depth = 0
+
+    def cover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        if self.stats is not None:
+            self.stats.propagations += 1
+        self.covered[col] = True
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+        self.covered[col] = False
+
+    def select(self, row):
+        """Put a candidate row in the solution by covering all of its columns.
+
+        Returns:
+            False if one of the row's constraints is already satisfied by another row.
+        """
+        first = self.row_start[row]
+        node = first
+        while True:
+            if self.covered[self.column[node]]:
+                return False
+            node = self.right[node]
+            if node == first:
+                break
+        while True:
+            self.cover(self.column[node])
+            node = self.right[node]
+            if node == first:
+                return True
+
+    def search(self, solution):
+        """Algorithm X, always branching on the column with the fewest rows.
+
+        The recursion is at most one level per box deep.
+
+        Input: A list that receives the selected rows. Rows already in it are the givens.
+        Output: True when the list holds a complete exact cover, False if there is none
+            or the cancelled function passed to the constructor returned True.
+        """
+        left, right, down, column, size, stats = self.left, self.right, self.down, self.column, self.size, self.stats
+        if self.cancelled is not None and self.cancelled():
+            return False
+        if stats is not None:
+            stats.nodes += 1
+        col = right[0]
+        if col == 0:
+            return True
+        best = size[col]
+        j = right[col]
+        while j and best > 1:
+            if size[j] < best:
+                col, best = j, size[j]
+            j = right[j]
+        if best == 0:
+            if stats is not None:
+                stats.contradiction(self.depth)
+            return False
+        self.cover(col)
+        r = down[col]
+        while r != col:
+            row = self.row_of[r]
+            solution.append(row)
+            if stats is not None:
+                self.depth += 1
+                digits = self.topology.size
+                stats.branch(self.topology.names[row // digits], self.topology.digits[row % digits], self.depth)
+            j = right[r]
+            while j != r:
+                self.cover(column[j])
+                j = right[j]
+            if self.search(solution):
+                return True
+            solution.pop()
+            if stats is not None:
+                self.depth -= 1
+                stats.backtracks += 1
+            j = left[r]
+            while j != r:
+                self.uncover(column[j])
+                j = left[j]
+            r = down[r]
+        self.uncover(col)
+        return False
+
+
+def solve_board(board, stats=None, topology=bitboard.STANDARD, budget=None):
+    """Solve a board whose boxes are either solved or empty.
+
+    Input: A board as produced by bitboard.grid_board(), optional stats.SolverStats,
+        the topology.Topology of the board and an optional budget.Budget.
+    Output: The solved board, or False if there is no solution or the budget ran out.
+    """
+    digits = topology.size
+    links = DancingLinks(stats, topology, budget)
+    solution = []
+    for cell, mask in enumerate(board):
+        if topology.bit_count[mask] == 1:
+            row = cell * digits + topology.single_bits.index(mask)
+            if not links.select(row):
+                return False
+            solution.append(row)
+    if not links.search(solution):
+        return False
+    solved = board[:]
+    for row in solution:
+        solved[row // digits] = topology.single_bits[row % digits]
+    return solved
+
+
+def solve(grid, stats=None, topology=bitboard.STANDARD, budget=None):
+    """Find the solution to a Sudoku grid using Dancing Links.
+
+    Only the final assignments are recorded when tracing, since the search
+    never materializes intermediate boards.
+
+    Args:
+        grid(string): a string representing a sudoku grid.
+        stats(stats.SolverStats): optional counters to fill in.
+        topology(topology.Topology): shape of the board, the standard diagonal 9 x 9 by default.
+        budget(budget.Budget): optional limits to stop the search at.
+    Returns:
+        The dictionary representation of the final sudoku grid. False if no solution exists
+        or the budget ran out.
+    """
+    board = bitboard.grid_board(grid, topology)
+    recorder = tracing.active()
+    if recorder is not None:
+        recorder.start(bitboard.board_values(board, topology))
+    solved = solve_board(board, stats, topology, budget)
+    if solved is False:
+        return False
+    if recorder is not None:
+        bitboard.record_changes(recorder, board, solved, topology)
+    return bitboard.board_values(solved, topology)
+
+
+def compare(grids, engines=('bitboard', 'dlx')):
+    """Time each engine on the same grids and check that they agree on solvability.
+
+    Returns:
+        A dictionary mapping each engine to its total and worst solve time in seconds.
+    """
+    import time
+    import solution
+
+    timings = {}
+    outcomes = {}
+    for engine in engines:
+        total = worst = 0.0
+        outcomes[engine] = []
+        for grid in grids:
+            start = time.perf_counter()
+            outcomes[engine].append(bool(solution.solve(grid, engine=engine)))
+            elapsed = time.perf_counter() - start
+            total += elapsed
+            worst = max(worst, elapsed)
+        timings[engine] = (total, worst)
+    assert all(outcomes[engine] == outcomes[engines[0]] for engine in engines)
+    return timings
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), 'corpora', 'hard.txt')
+    with open(path) as puzzles:
+        grids = [line.strip() for line in puzzles if line.strip()]
+    for engine, (total, worst) in sorted(compare(grids).items()):
+        print('{:10} {:8.1f} ms total {:8.2f} ms worst  ({} puzzles)'.format(engine, total * 1000, worst * 1000, len(grids)))
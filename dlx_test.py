@@ -0,0 +1,31 @@
+import bitboard
+import dlx
+import os
+import solution
+import solution_test
+import unittest
+
+
+class TestDancingLinks(unittest.TestCase):
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(solution_test.TestDiagonalSudoku.diagonal_grid, engine='dlx'),
+                         solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_conflicting_givens(self):
+        self.assertFalse(dlx.solve('11' + '.' * 79))
+
+    def test_unsolvable(self):
+        # No given conflicts with another, but A1 has no candidate left.
+        grid = '.23456789' + '1' + '.' * 71
+        self.assertFalse(solution.solve(grid))
+        self.assertFalse(dlx.solve(grid))
+
+    def test_hard_puzzles_match_bitboard(self):
+        with open(os.path.join(os.path.dirname(__file__), 'corpora', 'hard.txt')) as puzzles:
+            grids = [line.strip() for line in puzzles][:3]
+        for grid in grids:
+            self.assertEqual(dlx.solve(grid), bitboard.solve(grid))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,297 @@
+"""Generate random diagonal Sudoku puzzles with a unique solution, graded by difficulty.
+
+    python generator.py 1000 --difficulty hard --seed 1 > puzzles.txt
+    python generator.py 1000 --workers 4 | python solution.py -
+
+A puzzle starts as a random solved board: the main diagonal gets a random
+permutation of the digits, a few more random boxes get random candidates, and
+the bitboard search completes the board. Clues are then removed in random
+order, in groups while that keeps the solution unique and one at a time
+afterwards, until no clue can be removed.
+
+Difficulty is graded by what it takes to solve the puzzle:
+
+    easy    eliminate and only_choice alone solve it
+    medium  also needs naked_twins, pointing_pairs or box_line_reduction
+    hard    also needs hidden pairs or naked and hidden triples
+    expert  solution.reduce_puzzle() gets stuck and search is needed
+
+Removing clues never makes a puzzle easier, so for a requested difficulty the
+generator keeps the most clues removed that still grade at that difficulty,
+and starts over from a new board if there is none.
+"""
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import os
+import random
+import sys
+
+import bitboard
+import solution
+import stats
+import topology
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+# The cost of the most expensive strategy each difficulty may need.
+MAX_COST = {'easy': 2, 'medium': 4, 'hard': 7}
+# Off-diagonal boxes given a random candidate before completing a solved board.
+RANDOM_BOXES = 6
+# The board without its diagonal units, with the same box numbering as bitboard.STANDARD.
+LINES_AND_SQUARES = topology.get(3, diagonal=False)
+
+
+def random_solution(rng):
+    """Return a random solved board.
+
+    Args:
+        rng(random.Random): source of randomness.
+    """
+    size = bitboard.STANDARD.size
+    while True:
+        board = [bitboard.FULL] * bitboard.STANDARD.cells
+        for i, bit in enumerate(rng.sample(bitboard.SINGLE_BITS, size)):
+            board[i * (size + 1)] = bit
+        board = bitboard.reduce_puzzle(board)
+        for cell in rng.sample(range(len(board)), RANDOM_BOXES):
+            if board is False:
+                break
+            board[cell] = rng.choice([bit for bit in bitboard.SINGLE_BITS if board[cell] & bit])
+            board = bitboard.propagate(board, (cell,))
+        if board is not False:
+            board = bitboard.search(board)
+            if board:
+                return board
+
+
+def _is_unique_without(board, cell, bit):
+    # The puzzle stays unique without the clue if no solution has another digit there.
+    test = board[:]
+    test[cell] = bitboard.FULL & ~bit
+    return bitboard.search(test) is False
+
+
+def removal_order(solved, rng, group=16):
+    """Remove clues from a solved board in random order while its solution stays unique.
+
+    Clues are first removed in groups, checked with one count_solutions() call per
+    group, and the group shrinks each time removing it would allow a second solution.
+
+    Args:
+        solved(list): a solved board.
+        rng(random.Random): source of randomness.
+        group(int): number of clues to try removing at once at first.
+    Returns:
+        The removed boxes, in order. Removing any prefix of them leaves a unique puzzle,
+        and removing all of them leaves a minimal one.
+    """
+    board = solved[:]
+    pending = list(range(len(board)))
+    rng.shuffle(pending)
+    removed = []
+    while pending:
+        if group == 1:
+            cell = pending.pop(0)
+            bit = board[cell]
+            board[cell] = bitboard.FULL
+            if _is_unique_without(board, cell, bit):
+                removed.append(cell)
+            else:
+                board[cell] = bit
+            continue
+        cells = pending[:group]
+        saved = [board[cell] for cell in cells]
+        for cell in cells:
+            board[cell] = bitboard.FULL
+        if bitboard.count_solutions(board[:]) == 1:
+            removed.extend(cells)
+            del pending[:group]
+        else:
+            for cell, bit in zip(cells, saved):
+                board[cell] = bit
+            group //= 2
+    return removed
+
+
+def puzzle_grid(solved, removed):
+    """Return the grid string of a solved board with the given boxes emptied."""
+    grid = [bitboard.MASK_DIGITS[mask] for mask in solved]
+    for cell in removed:
+        grid[cell] = '.'
+    return ''.join(grid)
+
+
+def _reduce_and_grade(values):
+    # Return the difficulty of a sudoku in dictionary form and the strategies that removed candidates.
+    counters = stats.SolverStats()
+    values = solution.reduce_puzzle(values, counters)
+    used = [name for name, _ in solution.strategy_pipeline(counters.strategies)
+            if counters.strategies[name]['eliminations']]
+    if values is False or any(len(value) > 1 for value in values.values()):
+        return 'expert', used
+    cost = max([solution.strategies[name][0] for name in used] or [0])
+    return next(level for level in DIFFICULTIES if cost <= MAX_COST.get(level, cost)), used
+
+
+def grade(grid):
+    """Grade the difficulty of a grid by the strategies and search it needs.
+
+    Args:
+        grid(string): a string representing a sudoku grid with a unique solution.
+    Returns:
+        A dictionary with the 'difficulty' (one of DIFFICULTIES), the 'strategies'
+        of solution.reduce_puzzle() that removed candidates, cheapest first, the
+        search 'nodes' the bitboard engine visits and the number of 'clues'.
+    """
+    difficulty, used = _reduce_and_grade(solution.grid_values(grid))
+    counters = stats.SolverStats()
+    bitboard.search(bitboard.grid_board(grid), stats=counters)
+    return {
+        'difficulty': difficulty,
+        'strategies': used,
+        'nodes': counters.nodes,
+        'clues': len(grid) - grid.count('.'),
+    }
+
+
+def _only_choice(board):
+    # solution.only_choice() leaves the diagonals out, unlike bitboard.only_choice().
+    return bitboard.only_choice(board, LINES_AND_SQUARES)
+
+
+def _solved_by(board, strategies):
+    # Apply the bitboard strategies until the board stops changing, and tell whether that solves it.
+    while True:
+        before = board[:]
+        for strategy in strategies:
+            if strategy(board) is False:
+                return False
+        if board == before:
+            return all(bitboard.BIT_COUNT[mask] == 1 for mask in board)
+
+
+def difficulty_rank(grid):
+    """Return the index in DIFFICULTIES of the difficulty grade() gives a grid with a unique solution.
+
+    The strategies up to naked_twins are run with their much faster bitboard versions,
+    and solution.reduce_puzzle() only takes over from the board they get stuck on. They
+    reach the same board whatever order they run in, which is the board reduce_puzzle()
+    has when it first needs a more expensive strategy, so the grade is the same.
+    """
+    board = bitboard.grid_board(grid)
+    if _solved_by(board, (bitboard.eliminate, _only_choice)):
+        return 0
+    if _solved_by(board, (bitboard.eliminate, _only_choice, bitboard.naked_twins)):
+        return 1
+    return DIFFICULTIES.index(_reduce_and_grade(bitboard.board_values(board))[0])
+
+
+def generate(rng, difficulty=None):
+    """Generate one puzzle with a unique solution.
+
+    Args:
+        rng(random.Random): source of randomness.
+        difficulty(string): one of DIFFICULTIES, or None for a minimal puzzle of any difficulty.
+    Returns:
+        (grid, grade) where grade is the dictionary returned by grade().
+    """
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise ValueError('Unknown difficulty: {}'.format(difficulty))
+    target = None if difficulty is None else DIFFICULTIES.index(difficulty)
+    while True:
+        solved = random_solution(rng)
+        removed = removal_order(solved, rng)
+        grids = {}
+        ranks = {}
+
+        def rank(k):
+            if k not in grids:
+                grids[k] = puzzle_grid(solved, removed[:k])
+                ranks[k] = difficulty_rank(grids[k])
+            return ranks[k]
+
+        if target is None:
+            grid = puzzle_grid(solved, removed)
+            return grid, grade(grid)
+        if rank(len(removed)) <= target:
+            k = len(removed)
+        else:
+            # Binary search for the most clues removed that still grade at most target.
+            low, high = 0, len(removed)
+            while high - low > 1:
+                middle = (low + high) // 2
+                if rank(middle) <= target:
+                    low = middle
+                else:
+                    high = middle
+            k = low
+        if rank(k) == target:
+            return grids[k], grade(grids[k])
+
+
+def _generate_chunk(seed, difficulty, count):
+    rng = random.Random(seed)
+    return [generate(rng, difficulty) for _ in range(count)]
+
+
+def puzzles(count=None, difficulty=None, seed=None, workers=1, chunksize=8):
+    """Yield freshly generated puzzles, lazily.
+
+    Args:
+        count(int): number of puzzles, or None for an endless stream.
+        difficulty(string): one of DIFFICULTIES, or None for minimal puzzles of any difficulty.
+        seed(int): makes the stream reproducible for a given chunksize, whatever the
+            number of workers.
+        workers(int): worker processes to generate in; with workers=1 puzzles are
+            generated in this process.
+        chunksize(int): puzzles a worker generates per task.
+    Returns:
+        A generator of (grid, grade) tuples.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    if count is None:
+        sizes = itertools.repeat(chunksize)
+    else:
+        sizes = (min(chunksize, count - start) for start in range(0, count, chunksize))
+    tasks = ((seed * 1000003 + chunk, size) for chunk, size in enumerate(sizes))
+    if workers == 1:
+        for chunk_seed, size in tasks:
+            for puzzle in _generate_chunk(chunk_seed, difficulty, size):
+                yield puzzle
+        return
+    workers = workers or os.cpu_count() or 1
+    executor = concurrent.futures.ProcessPoolExecutor(workers)
+    try:
+        pending = collections.deque(executor.submit(_generate_chunk, chunk_seed, difficulty, size)
+                                    for chunk_seed, size in itertools.islice(tasks, 2 * workers))
+        while pending:
+            chunk = pending.popleft().result()
+            pending.extend(executor.submit(_generate_chunk, chunk_seed, difficulty, size)
+                           for chunk_seed, size in itertools.islice(tasks, 1))
+            for puzzle in chunk:
+                yield puzzle
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate diagonal Sudoku puzzles with a unique solution.')
+    parser.add_argument('count', type=int, help='number of puzzles to generate')
+    parser.add_argument('--difficulty', choices=DIFFICULTIES, help='difficulty of the puzzles (default: any)')
+    parser.add_argument('--seed', type=int, help='random seed, for a reproducible set of puzzles')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='worker processes (default: 1)')
+    parser.add_argument('--grades', action='store_true', help='write the grade after each grid, tab separated')
+    args = parser.parse_args(argv)
+    for grid, graded in puzzles(args.count, args.difficulty, args.seed, args.workers):
+        if args.grades:
+            sys.stdout.write('{}\t{}\t{}\t{}\n'.format(grid, graded['difficulty'], graded['nodes'],
+                                                       ','.join(graded['strategies'])))
+        else:
+            sys.stdout.write(grid + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
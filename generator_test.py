@@ -0,0 +1,56 @@
+import benchmark
+import bitboard
+import generator
+import random
+import solution
+import unittest
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_random_solution(self):
+        board = generator.random_solution(random.Random(1))
+        self.assertTrue(all(bitboard.BIT_COUNT[mask] == 1 for mask in board))
+        self.assertEqual(bitboard.propagate(board[:], range(81)), board)
+
+    def test_unique_and_minimal(self):
+        grid, grade = generator.generate(random.Random(2))
+        self.assertTrue(solution.is_unique(grid))
+        self.assertEqual(grade['clues'], 81 - grid.count('.'))
+        for i, c in enumerate(grid):
+            if c != '.':
+                self.assertFalse(solution.is_unique(grid[:i] + '.' + grid[i + 1:]))
+
+    def test_difficulty(self):
+        rng = random.Random(3)
+        for difficulty in generator.DIFFICULTIES:
+            grid, grade = generator.generate(rng, difficulty)
+            self.assertTrue(solution.is_unique(grid))
+            self.assertEqual(grade['difficulty'], difficulty)
+            self.assertEqual(generator.grade(grid), grade)
+
+    def test_grade(self):
+        grade = generator.grade(benchmark.load_corpus('easy')[0])
+        self.assertEqual(grade['difficulty'], 'easy')
+        self.assertEqual(grade['nodes'], 1)
+        self.assertEqual(grade['strategies'][0], 'eliminate')
+        self.assertEqual(generator.grade(benchmark.load_corpus('hard')[0])['difficulty'], 'expert')
+
+    def test_difficulty_rank_matches_grade(self):
+        rng = random.Random(6)
+        solved = generator.random_solution(rng)
+        removed = generator.removal_order(solved, rng)
+        for k in range(20, len(removed) + 1, 4):
+            grid = generator.puzzle_grid(solved, removed[:k])
+            self.assertEqual(generator.DIFFICULTIES[generator.difficulty_rank(grid)],
+                             generator.grade(grid)['difficulty'])
+
+    def test_puzzles(self):
+        generated = list(generator.puzzles(5, 'easy', seed=4, chunksize=2))
+        self.assertEqual(len(generated), 5)
+        self.assertEqual(generated, list(generator.puzzles(5, 'easy', seed=4, chunksize=2, workers=2)))
+        self.assertRaises(ValueError, generator.generate, random.Random(), 'trivial')
+
+
+if __name__ == '__main__':
+    unittest.main()
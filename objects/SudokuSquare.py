@@ -2,23 +2,23 @@ import pygame
 
 from pygame import *
 
-def AAfilledRoundedRect(surface,rect,color,radius=0.4):
+def roundedRectSurface(size,color,radius=0.4):
 
     """
-    AAfilledRoundedRect(surface,rect,color,radius=0.4)
+    roundedRectSurface(size,color,radius=0.4) -> Surface
 
-    surface : destination
-    rect    : rectangle
+    size    : (width, height)
     color   : rgb or rgba
     radius  : 0 <= radius <= 1
+
+    Returns an antialiased filled rounded rectangle on a transparent surface,
+    ready to be blitted as many times as needed.
     """
 
-    rect         = Rect(rect)
+    rect         = Rect((0,0),size)
     color        = Color(*color)
     alpha        = color.a
     color.a      = 0
-    pos          = rect.topleft
-    rect.topleft = 0,0
     rectangle    = Surface(rect.size,SRCALPHA)
 
     circle       = Surface([min(rect.size)*3]*2,SRCALPHA)
@@ -39,7 +39,21 @@ def AAfilledRoundedRect(surface,rect,color,radius=0.4):
     rectangle.fill(color,special_flags=BLEND_RGBA_MAX)
     rectangle.fill((255,255,255,alpha),special_flags=BLEND_RGBA_MIN)
 
-    return surface.blit(rectangle,pos)
+    return rectangle
+
+def AAfilledRoundedRect(surface,rect,color,radius=0.4):
+
+    """
+    AAfilledRoundedRect(surface,rect,color,radius=0.4)
+
+    surface : destination
+    rect    : rectangle
+    color   : rgb or rgba
+    radius  : 0 <= radius <= 1
+    """
+
+    rect = Rect(rect)
+    return surface.blit(roundedRectSurface(rect.size,color,radius),rect.topleft)
 
 class SudokuSquare:
     """A sudoku square class."""
@@ -0,0 +1,244 @@
+"""Packed binary puzzle files, read through a memory map.
+
+    python packed.py pack puzzles.txt puzzles.sdkp
+    python packed.py unpack puzzles.sdkp > puzzles.txt
+    python solution.py puzzles.sdkp --workers 4
+
+A file holds a 16 byte header followed by fixed-size records, one per puzzle,
+in one of two kinds:
+
+    GRIDS   41 bytes: a grid with 4 bits per box, high nibble first, 0 for an
+            empty box and the digit otherwise.
+    BOARDS  162 bytes: a board with the candidate mask of every box as a little
+            endian uint16, the masks of bitboard.py. Partial boards keep their
+            candidates.
+
+The header is the magic b'SDKP', a format version byte, the kind byte, the
+number of boxes per record (uint16) and the number of records (uint64), all
+little endian.
+
+Since a grid record is the grid with '.' read as 0 and hex encoded, packing
+and unpacking grids is a translate and a hex conversion. A Reader maps the
+file instead of reading it, and hands out records as memoryview slices or
+NumPy array views of the mapping, so nothing is copied until a record is
+decoded.
+"""
+import argparse
+import mmap
+import struct
+import sys
+
+import bitboard
+import solution
+
+MAGIC = b'SDKP'
+VERSION = 1
+GRIDS, BOARDS = 0, 1
+HEADER = struct.Struct('<4sBBHQ')
+CELLS = bitboard.STANDARD.cells
+RECORD_SIZE = {GRIDS: (CELLS + 1) // 2, BOARDS: 2 * CELLS}
+_BOARD = struct.Struct('<{}H'.format(CELLS))
+_TO_HEX = str.maketrans('.', '0')
+_FROM_HEX = str.maketrans('0', '.')
+
+
+def pack_grid(grid):
+    """Pack a grid string into a GRIDS record.
+
+    Args:
+        grid(string): an 81 character grid, '.' for the empty boxes.
+    Returns:
+        The 41 byte record.
+    """
+    if len(grid) != CELLS or not solution.GRID_CHARS.issuperset(grid):
+        raise ValueError('Invalid grid: {!r}'.format(grid))
+    text = grid.translate(_TO_HEX)
+    return bytes.fromhex(text + '0' * (len(text) % 2))
+
+
+def unpack_grid(record):
+    """Return the grid string of a GRIDS record (bytes or memoryview)."""
+    return record.hex()[:CELLS].translate(_FROM_HEX)
+
+
+def pack_board(board):
+    """Pack a board, a list of candidate masks, into a BOARDS record."""
+    return _BOARD.pack(*board)
+
+
+def unpack_board(record):
+    """Return the board of a BOARDS record as a list of candidate masks."""
+    return list(_BOARD.unpack(record))
+
+
+def pack_values(values):
+    """Pack a Sudoku in dictionary form into a BOARDS record."""
+    return pack_board(bitboard.values_board(values))
+
+
+def unpack_values(record):
+    """Return the {<box>: <value>} dictionary form of a BOARDS record."""
+    return bitboard.board_values(unpack_board(record))
+
+
+def write(path, puzzles, kind=GRIDS):
+    """Write puzzles to a packed file, streaming them from an iterable.
+
+    Args:
+        path(string): the file to write.
+        puzzles: iterable of grid strings for GRIDS, or of boards for BOARDS.
+        kind(int): GRIDS or BOARDS.
+    Returns:
+        The number of records written.
+    """
+    pack = {GRIDS: pack_grid, BOARDS: pack_board}[kind]
+    count = 0
+    with open(path, 'wb') as stream:
+        stream.write(HEADER.pack(MAGIC, VERSION, kind, CELLS, 0))
+        for puzzle in puzzles:
+            stream.write(pack(puzzle))
+            count += 1
+        stream.seek(0)
+        stream.write(HEADER.pack(MAGIC, VERSION, kind, CELLS, count))
+    return count
+
+
+def is_packed(path):
+    """Return True if the file at path starts like a packed puzzle file."""
+    with open(path, 'rb') as stream:
+        return stream.read(len(MAGIC)) == MAGIC
+
+
+class Reader(object):
+    """Read-only memory map of a packed puzzle file.
+
+    Records are views of the mapping, valid until the reader is closed; a view still
+    alive at that point keeps the mapping open until it is released.
+
+    Args:
+        path(string): the packed file.
+    Attributes:
+        kind: GRIDS or BOARDS.
+        record_size: bytes per record.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._map) < HEADER.size:
+                raise ValueError('{}: not a packed puzzle file'.format(path))
+            magic, version, self.kind, cells, self._count = HEADER.unpack_from(self._map)
+            if magic != MAGIC or version != VERSION or self.kind not in RECORD_SIZE or cells != CELLS:
+                raise ValueError('{}: not a packed puzzle file of version {}'.format(path, VERSION))
+            self.record_size = RECORD_SIZE[self.kind]
+            if len(self._map) != HEADER.size + self._count * self.record_size:
+                raise ValueError('{}: truncated packed puzzle file'.format(path))
+        except ValueError:
+            self._map.close()
+            raise
+        self._view = memoryview(self._map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmap the file, unless views of its records are still in use."""
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """Return the index-th record as a memoryview of the mapping."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('record index out of range')
+        start = HEADER.size + index * self.record_size
+        return self._view[start:start + self.record_size]
+
+    def records(self):
+        """Yield every record as a memoryview of the mapping."""
+        for index in range(self._count):
+            yield self[index]
+
+    def grids(self):
+        """Yield the grid string of every record of a GRIDS file."""
+        if self.kind != GRIDS:
+            raise ValueError('Board records have candidates a grid string cannot hold')
+        size = self.record_size
+        view = self._view
+        for start in range(HEADER.size, HEADER.size + self._count * size, size):
+            yield view[start:start + size].hex()[:CELLS].translate(_FROM_HEX)
+
+    def boards(self):
+        """Yield the board of every record, as a list of candidate masks."""
+        if self.kind == BOARDS:
+            for fields in _BOARD.iter_unpack(self._view[HEADER.size:]):
+                yield list(fields)
+        else:
+            for grid in self.grids():
+                yield bitboard.grid_board(grid)
+
+    def batches(self, size):
+        """Yield the records in read-only NumPy array views of up to size records each.
+
+        GRIDS batches are (n, 41) uint8 arrays and BOARDS batches (n, 81) uint16 arrays;
+        vectorized.packed_boards() turns either into boards to solve.
+        """
+        import numpy as np
+        dtype = np.dtype(np.uint8) if self.kind == GRIDS else np.dtype('<u2')
+        width = self.record_size // dtype.itemsize
+        for first in range(0, self._count, size):
+            count = min(size, self._count - first)
+            array = np.frombuffer(self._map, dtype, count * width, HEADER.size + first * self.record_size)
+            yield array.reshape(count, width)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='packed.py', description='Convert between grid text files and packed files.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack', help='pack a file with one grid per line')
+    pack.add_argument('input', help="file with one grid per line, or '-' for stdin")
+    pack.add_argument('output', help='packed file to write')
+    pack.add_argument('--boards', action='store_true', help='write candidate mask records instead of 4 bit grids')
+    unpack = commands.add_parser('unpack', help="write the grids of a packed file, one per line, with '.' "
+                                                 'for the unsolved boxes of boards')
+    unpack.add_argument('input', help='packed file to read')
+    args = parser.parse_args(argv)
+    if args.command == 'pack':
+        import cli
+        counts = {'invalid': 0}
+        source = sys.stdin if args.input == '-' else open(args.input)
+        try:
+            grids = (grid for _, grid in cli.read_grids(source, sys.stderr, counts))
+            if args.boards:
+                count = write(args.output, (bitboard.grid_board(grid) for grid in grids), BOARDS)
+            else:
+                count = write(args.output, grids)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        sys.stderr.write('{} puzzles packed\n'.format(count))
+        return 1 if counts['invalid'] else 0
+    with Reader(args.input) as reader:
+        if reader.kind == GRIDS:
+            lines = reader.grids()
+        else:
+            lines = (''.join(bitboard.MASK_DIGITS[mask] if bitboard.BIT_COUNT[mask] == 1 else '.' for mask in board)
+                     for board in reader.boards())
+        for line in lines:
+            sys.stdout.write(line + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import bitboard
+import os
+import packed
+import shutil
+import solution
+import solution_test
+import tempfile
+import unittest
+
+try:
+    import numpy
+    import vectorized
+except ImportError:
+    numpy = None
+
+
+class TestPacked(unittest.TestCase):
+    grids = [solution_test.TestDiagonalSudoku.diagonal_grid,
+             '11' + '.' * 79,
+             '.' * 81]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'puzzles.sdkp')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_grid_records(self):
+        record = packed.pack_grid(self.grids[0])
+        self.assertEqual(len(record), 41)
+        self.assertEqual(record[:2], bytes([0x20, 0x00]))
+        self.assertEqual(packed.unpack_grid(record), self.grids[0])
+        self.assertRaises(ValueError, packed.pack_grid, 'x' * 81)
+        self.assertRaises(ValueError, packed.pack_grid, '.' * 80)
+        self.assertRaises(ValueError, packed.pack_grid, '0' + '.' * 80)
+
+    def test_board_records(self):
+        board = bitboard.reduce_puzzle(bitboard.grid_board(self.grids[0]))
+        record = packed.pack_board(board)
+        self.assertEqual(len(record), 162)
+        self.assertEqual(packed.unpack_board(record), board)
+        values = bitboard.board_values(board)
+        self.assertEqual(packed.unpack_values(packed.pack_values(values)), values)
+
+    def test_reader(self):
+        self.assertEqual(packed.write(self.path, iter(self.grids)), 3)
+        self.assertEqual(os.path.getsize(self.path), packed.HEADER.size + 3 * 41)
+        self.assertTrue(packed.is_packed(self.path))
+        with packed.Reader(self.path) as reader:
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(list(reader.grids()), self.grids)
+            self.assertEqual(packed.unpack_grid(reader[-1]), self.grids[-1])
+            self.assertIsInstance(reader[0], memoryview)
+            self.assertEqual(list(reader.boards()), [bitboard.grid_board(grid) for grid in self.grids])
+            self.assertRaises(IndexError, reader.__getitem__, 3)
+
+    def test_board_reader(self):
+        boards = [bitboard.grid_board(grid) for grid in self.grids]
+        packed.write(self.path, boards, packed.BOARDS)
+        with packed.Reader(self.path) as reader:
+            self.assertEqual(reader.kind, packed.BOARDS)
+            self.assertEqual(list(reader.boards()), boards)
+            self.assertRaises(ValueError, lambda: list(reader.grids()))
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as stream:
+            stream.write(b'not a packed puzzle file')
+        self.assertFalse(packed.is_packed(self.path))
+        self.assertRaises(ValueError, packed.Reader, self.path)
+        packed.write(self.path, self.grids)
+        with open(self.path, 'ab') as stream:
+            stream.write(b'\0')
+        self.assertRaises(ValueError, packed.Reader, self.path)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_batches(self):
+        packed.write(self.path, self.grids)
+        with packed.Reader(self.path) as reader:
+            batches = list(reader.batches(2))
+            self.assertEqual([batch.shape for batch in batches], [(2, 41), (1, 41)])
+            self.assertFalse(batches[0].flags.writeable)
+            boards = numpy.concatenate([vectorized.packed_boards(batch) for batch in batches])
+            del batches
+        self.assertEqual(boards.tolist(), vectorized.grids_boards(self.grids).tolist())
+        self.assertEqual(vectorized.solve_boards(boards), [solution.solve(grid) for grid in self.grids])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_board_batches(self):
+        boards = [bitboard.grid_board(grid) for grid in self.grids]
+        packed.write(self.path, boards, packed.BOARDS)
+        with packed.Reader(self.path) as reader:
+            batch, = reader.batches(8)
+            self.assertEqual(vectorized.packed_boards(batch).tolist(), boards)
+
+
+if __name__ == '__main__':
+    unittest.main()
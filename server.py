@@ -0,0 +1,294 @@
+"""Solve grids for other services over a local TCP or Unix socket.
+
+    python server.py --port 8765 --workers 4
+    python server.py --unix /tmp/sudoku.sock
+
+The protocol is line based. A client writes one request per line: an 81
+character grid, optionally followed by a space and a deadline in
+milliseconds. The server answers every request with one line, in request
+order, so a client may pipeline as many requests as it likes:
+
+    solved <81 digits>
+    unsolvable
+    timeout
+    invalid
+    error
+
+Requests from all connections go into one bounded queue. A dispatcher takes
+them off in batches of up to batch_size, waiting batch_delay seconds for a
+small batch to fill up, and solves each batch in a process pool with at most
+two batches per worker in flight. When the queue is full the server stops
+reading from its connections, so clients that send faster than the pool
+solves are slowed down by TCP instead of growing the server's memory.
+
+Every request has a deadline, the server default unless the request sets
+one, which may not be longer than the server maximum. Requests whose deadline
+passes while they wait are answered with timeout without being solved, and
+the rest are solved with the time left as the solve() timeout.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import math
+import os
+import time
+
+import solution
+import tracing
+
+
+def _init_worker():
+    tracing.deactivate()
+
+
+def _fail(requests, error):
+    """Answer the (grid, deadline, future) requests not answered yet with an error."""
+    for _, _, future in requests:
+        if not future.done():
+            future.set_exception(error)
+
+
+def _solve_batch(engine, requests):
+    """Solve (grid, deadline) requests, deadlines being time.time() values, and return the response lines."""
+    responses = []
+    for grid, deadline in requests:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            responses.append('timeout')
+            continue
+        values = solution.solve(grid, engine=engine, timeout=remaining)
+        if values:
+            responses.append('solved ' + ''.join(values[box] for box in solution.boxes))
+        elif values is False:
+            responses.append('unsolvable')
+        else:
+            responses.append('timeout')
+    return responses
+
+
+def parse_request(line):
+    """Return the (grid, deadline in seconds or None) of a request line, or None if it is invalid."""
+    parts = line.split()
+    if not 1 <= len(parts) <= 2 or len(parts[0]) != 81 or not solution.GRID_CHARS.issuperset(parts[0]):
+        return None
+    if len(parts) == 1:
+        return parts[0], None
+    try:
+        milliseconds = float(parts[1])
+    except ValueError:
+        return None
+    if not math.isfinite(milliseconds) or milliseconds < 0:
+        return None
+    return parts[0], milliseconds / 1000.0
+
+
+class SolverServer(object):
+    """An asyncio server handing the grids it receives to a pool of worker processes.
+
+    Args:
+        workers(int): number of worker processes, defaults to the number of CPUs.
+        engine(string): solver engine passed to solution.solve().
+        timeout(float): default deadline of a request, in seconds.
+        max_pending(int): number of requests that may wait for a batch before the
+            server stops reading from its connections.
+        batch_size(int): maximum number of requests solved as one pool task.
+        batch_delay(float): seconds to wait for more requests when a batch is not full.
+        max_timeout(float): longest deadline a request may ask for, in seconds; longer
+            ones are cut down to it.
+    Attributes:
+        batches: number of batches handed to the pool so far.
+    """
+
+    def __init__(self, workers=None, engine='bitboard', timeout=1.0, max_pending=256, batch_size=16,
+                 batch_delay=0.002, max_timeout=60.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_timeout = max_timeout
+        self.batches = 0
+        self._queue = None
+        self._slots = None
+        self._executor = None
+        self._dispatcher = None
+        self._server = None
+        # {task: batch} for the batches handed to the pool and not answered yet.
+        self._running = {}
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """Start listening on a TCP port, or on a Unix socket when path is given.
+
+        Returns:
+            The asyncio server, whose sockets give the address actually bound.
+        """
+        self._queue = asyncio.Queue(self.max_pending)
+        self._slots = asyncio.Semaphore(2 * self.workers)
+        self._executor = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        """Stop listening, fail the requests not answered yet, and shut the worker processes down.
+
+        The batches the workers already started are left to finish, without blocking the
+        event loop while they do.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        closed = RuntimeError('The server was closed')
+        running = list(self._running.items())
+        tasks = [task for task, _ in running]
+        if self._dispatcher is not None:
+            tasks.append(self._dispatcher)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for _, batch in running:
+            _fail(batch, closed)
+        if self._queue is not None:
+            queued = []
+            while not self._queue.empty():
+                queued.append(self._queue.get_nowait())
+            _fail(queued, closed)
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self._executor.shutdown, cancel_futures=True))
+
+    async def solve(self, grid, timeout=None):
+        """Queue a grid and return its response line once it is solved.
+
+        Waits while the queue is full.
+        """
+        future = await self._submit(grid, timeout)
+        return await future
+
+    async def _handle(self, reader, writer):
+        # Bounded too, so that a client cannot pile up answered requests it never reads.
+        responses = asyncio.Queue(self.max_pending)
+        sender = asyncio.get_running_loop().create_task(self._send(responses, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = parse_request(line.decode('ascii', 'replace'))
+                if request is None:
+                    future = asyncio.get_running_loop().create_future()
+                    future.set_result('invalid')
+                else:
+                    future = await self._submit(*request)
+                await responses.put(future)
+        finally:
+            await responses.put(None)
+            await sender
+            writer.close()
+
+    async def _submit(self, grid, timeout):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = time.time() + min(self.timeout if timeout is None else timeout, self.max_timeout)
+        await self._queue.put((grid, deadline, future))
+        return future
+
+    async def _send(self, responses, writer):
+        # Write the responses of a connection in request order.
+        while True:
+            future = await responses.get()
+            if future is None:
+                return
+            try:
+                line = await future
+            except Exception:
+                line = 'error'
+            try:
+                writer.write(line.encode('ascii') + b'\n')
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    def _take(self, batch):
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            self._take(batch)
+            try:
+                if len(batch) < self.batch_size and self.batch_delay:
+                    await asyncio.sleep(self.batch_delay)
+                    self._take(batch)
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                _fail(batch, RuntimeError('The server was closed'))
+                raise
+            self.batches += 1
+            task = loop.create_task(self._run(batch))
+            self._running[task] = batch
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task):
+        del self._running[task]
+
+    async def _run(self, batch):
+        try:
+            now = time.time()
+            for grid, deadline, future in batch:
+                if deadline <= now:
+                    future.set_result('timeout')
+            batch = [request for request in batch if not request[2].done()]
+            if batch:
+                responses = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, _solve_batch, self.engine, [(grid, deadline) for grid, deadline, _ in batch])
+                for (_, _, future), response in zip(batch, responses):
+                    future.set_result(response)
+        except Exception as error:
+            _fail(batch, error)
+        finally:
+            self._slots.release()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='server.py', description='Serve diagonal Sudoku solutions over a socket.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on (default: 8765)')
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('-w', '--workers', type=int, help='worker processes (default: number of CPUs)')
+    parser.add_argument('--engine', default='bitboard', help='solver engine passed to solve()')
+    parser.add_argument('--timeout', type=float, default=1000.0, help='default request deadline in ms')
+    parser.add_argument('--max-timeout', type=float, default=60000.0, help='longest request deadline in ms')
+    parser.add_argument('--max-pending', type=int, default=256, help='requests queued before reading pauses')
+    parser.add_argument('--batch-size', type=int, default=16, help='requests solved as one pool task')
+    return parser.parse_args(argv)
+
+
+async def serve(args):
+    server = SolverServer(args.workers, args.engine, args.timeout / 1000.0, args.max_pending, args.batch_size,
+                          max_timeout=args.max_timeout / 1000.0)
+    listener = await server.start(args.host, args.port, args.unix)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    """Run the server until it is interrupted."""
+    try:
+        asyncio.run(serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    main()
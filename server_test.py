@@ -0,0 +1,91 @@
+import asyncio
+import benchmark
+import os
+import server
+import solution
+import solution_test
+import tempfile
+import unittest
+
+
+class TestSolverServer(unittest.IsolatedAsyncioTestCase):
+    grid = solution_test.TestDiagonalSudoku.diagonal_grid
+    solved = 'solved ' + ''.join(solution_test.TestDiagonalSudoku.solved_diag_sudoku[box] for box in solution.boxes)
+
+    async def asyncSetUp(self):
+        self.server = server.SolverServer(workers=1, batch_size=4)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def exchange(self, reader, writer, lines):
+        writer.write(''.join(line + '\n' for line in lines).encode('ascii'))
+        await writer.drain()
+        responses = [(await reader.readline()).decode('ascii').rstrip('\n') for _ in lines]
+        writer.close()
+        return responses
+
+    async def test_tcp_pipelined(self):
+        listener = await self.server.start()
+        host, port = listener.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        lines = [self.grid, '11' + '.' * 79, 'not a grid', self.grid + ' 0', self.grid + ' 5000', self.grid + ' nan']
+        responses = await self.exchange(reader, writer, lines)
+        self.assertEqual(responses, [self.solved, 'unsolvable', 'invalid', 'timeout', self.solved, 'invalid'])
+
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sudoku.sock')
+            await self.server.start(path=path)
+            reader, writer = await asyncio.open_unix_connection(path)
+            self.assertEqual(await self.exchange(reader, writer, [self.grid]), [self.solved])
+
+    async def test_batching(self):
+        await self.server.start()
+        responses = await asyncio.gather(*[self.server.solve(self.grid) for _ in range(8)])
+        self.assertEqual(responses, [self.solved] * 8)
+        self.assertTrue(self.server.batches <= 4)
+
+    async def test_max_timeout(self):
+        self.server.max_timeout = 0
+        await self.server.start()
+        self.assertEqual(await self.server.solve(self.grid, timeout=3600), 'timeout')
+
+    async def test_backpressure(self):
+        self.server.max_pending = 2
+        await self.server.start()
+        # The queue fills up while the dispatcher waits for the first batch to fill.
+        requests = [asyncio.ensure_future(self.server.solve(self.grid)) for _ in range(6)]
+        await asyncio.sleep(0)
+        self.assertEqual(self.server._queue.qsize(), 2)
+        self.assertEqual(await asyncio.gather(*requests), [self.solved] * 6)
+
+    async def test_close_in_flight(self):
+        self.server.engine = 'dict'
+        self.server.batch_size = 1
+        await self.server.start()
+        requests = [asyncio.ensure_future(self.server.solve(grid, timeout=60))
+                    for grid in benchmark.load_corpus('hard')[:4]]
+        while not self.server._running:
+            await asyncio.sleep(0.01)
+        closing = asyncio.ensure_future(self.server.close())
+        # The worker is still busy with its batch, but the event loop must keep running.
+        ticks = 0
+        while not closing.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        self.assertTrue(ticks > 10)
+        for result in await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 5):
+            self.assertIsInstance(result, RuntimeError)
+
+    def test_parse_request(self):
+        self.assertEqual(server.parse_request(self.grid + ' 250\n'), (self.grid, 0.25))
+        self.assertEqual(server.parse_request(self.grid), (self.grid, None))
+        self.assertIsNone(server.parse_request(self.grid + ' soon'))
+        self.assertIsNone(server.parse_request(self.grid[:80]))
+        for deadline in ('nan', 'inf', '-inf', '-5'):
+            self.assertIsNone(server.parse_request(self.grid + ' ' + deadline))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,82 @@
 # Sudoku AI
+import itertools
+import time
+
+import tracing
 
 def cross(a, b):
     return [s + t for s in a for t in b]
 
+rows = 'ABCDEFGHI'
+cols = '123456789'
+# The characters a grid string may hold: '.' for an empty box, or a digit.
+GRID_CHARS = frozenset('.123456789')
+
+# The unit and peer tables below are module attributes like rows and cols, but they
+# are only built by _build_tables() the first time one of them is used, so that
+# importing this module costs next to nothing.
+TABLES = ('boxes', 'row_units', 'column_units', 'square_units', 'diag_one', 'diag_two', 'diagonals',
+          'unitlist', 'units', 'peers', 'diagonal_units', 'line_units', 'all_units', 'box_units', 'intersections')
+_tables_built = False
+
+# The public names, listed so that ``from solution import *`` exports the tables too.
+__all__ = ['cross', 'diag_peers', 'rows', 'cols', 'GRID_CHARS', 'TABLES'] + list(TABLES) + [
+    'strategies', 'register_strategy', 'strategy_pipeline', 'assign_value', 'grid_values', 'display',
+    'eliminate', 'only_choice', 'eliminate_digits', 'naked_twins', 'naked_subsets', 'hidden_subsets',
+    'eliminate_intersections', 'pointing_pairs', 'box_line_reduction', 'hidden_pairs', 'naked_triples',
+    'hidden_triples', 'profile_strategy', 'reduce_puzzle', 'search', 'solve', 'count_solutions', 'is_unique']
+
+def _build_tables():
+    """Build the unit and peer tables as module globals."""
+    global boxes, row_units, column_units, square_units, diag_one, diag_two, diagonals
+    global unitlist, units, peers, diagonal_units, line_units, all_units, box_units, intersections, _tables_built
+    boxes = cross(rows, cols)
+    row_units = [cross(r, cols) for r in rows]
+    column_units = [cross(rows, c) for c in cols]
+    square_units = [cross(rs, cs) for rs in ('ABC', 'DEF', 'GHI') for cs in ('123', '456', '789')]
+    diag_one = set(rows[c] + str(c + 1) for c in (0, 1, 2, 3, 4, 5, 6, 7, 8))
+    diag_two = set(rows[c] + str(9 - c) for c in (0, 1, 2, 3, 4, 5, 6, 7, 8))
+    diagonals = [diag_one, diag_two]
+    unitlist = row_units + column_units + square_units
+    units = dict((s, []) for s in boxes)
+    for unit in unitlist:
+        for s in unit:
+            units[s].append(unit)
+    peers = dict((s, set().union(*units[s]) - set([s])) for s in boxes)
+    # Undecorated, since the tables are still being built.
+    peers = diag_peers.__wrapped__(peers)
+    # The diagonals as units, for the strategies that look inside a unit rather than at peers.
+    diagonal_units = [sorted(diagonal) for diagonal in diagonals]
+    line_units = row_units + column_units + diagonal_units
+    all_units = unitlist + diagonal_units
+    # The indexes in all_units of the units of every box.
+    box_units = dict((s, []) for s in boxes)
+    for u, unit in enumerate(all_units):
+        for s in unit:
+            box_units[s].append(u)
+    # (square, line, shared boxes) for every square and line that share more than one box.
+    intersections = [(square, line, shared) for square in square_units for line in line_units
+                     for shared in [set(square).intersection(line)] if len(shared) > 1]
+    _tables_built = True
+
+def __getattr__(name):
+    if name in TABLES:
+        _build_tables()
+        return globals()[name]
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+def _uses_tables(function):
+    """Decorator building the unit and peer tables before the first call of a function that reads them."""
+    def wrapper(*args, **kwargs):
+        if not _tables_built:
+            _build_tables()
+        return function(*args, **kwargs)
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    wrapper.__wrapped__ = function
+    return wrapper
+
+@_uses_tables
 def diag_peers(peers):
     for diagonal in diagonals:
         for box in diagonal:
@@ -10,36 +84,45 @@ def diag_peers(peers):
             peers[box].remove(box)
     return peers
 
-assignments = []
-rows = 'ABCDEFGHI'
-cols = '123456789'
-boxes = cross(rows, cols)
-row_units = [cross(r, cols) for r in rows]
-column_units = [cross(rows, c) for c in cols]
-square_units = [cross(rs, cs) for rs in ('ABC', 'DEF', 'GHI') for cs in ('123', '456', '789')]
-diag_one = set(rows[c] + str(c + 1) for c in (0, 1, 2, 3, 4, 5, 6, 7, 8))
-diag_two = set(rows[c] + str(9 - c) for c in (0, 1, 2, 3, 4, 5, 6, 7, 8))
-diagonals = [diag_one, diag_two]
-unitlist = row_units + column_units + square_units
-units = dict((s, [u for u in unitlist if s in u]) for s in boxes)
-peers = dict((s, set(sum(units[s], [])) - set([s])) for s in boxes)
-peers = diag_peers(peers)
+# Registry of the strategies reduce_puzzle() can run: {name: (cost, strategy)}.
+strategies = dict()
+
+def register_strategy(name, cost):
+    """Decorator adding a strategy to the reduce_puzzle() pipeline.
+
+    A strategy takes a Sudoku in dictionary form and returns it, with candidates removed
+    through assign_value(). Cheaper strategies run first, and more expensive ones only
+    run once the cheaper ones stop making progress.
+    """
+    def register(strategy):
+        strategies[name] = (cost, strategy)
+        return strategy
+    return register
+
+def strategy_pipeline(names=None):
+    """Return the [(name, strategy)] pairs for the given names, or all registered ones, cheapest first."""
+    if names is None:
+        names = strategies.keys()
+    return [(name, strategies[name][1]) for name in sorted(names, key=lambda name: (strategies[name][0], name))]
 
 def assign_value(values, box, value):
     """
     Please use this function to update your values dictionary!
-    Assigns a value to a given box. If it updates the board record it.
+    Assigns a value to a given box. If it updates the board and a tracing.Recorder
+    is active, record the change.
     """
 
-    # Don't waste memory appending actions that don't actually change any values
+    # Don't waste memory recording actions that don't actually change any values
     if values[box] == value:
         return values
 
+    recorder = tracing.active()
+    if recorder is not None:
+        recorder.record(box, values[box], value)
     values[box] = value
-    if len(value) == 1:
-        assignments.append(values.copy())
     return values
 
+@_uses_tables
 def grid_values(grid):
     """Convert grid string into {<box>: <value>} dict with '123456789' value for empties.
 
@@ -60,6 +143,7 @@ def grid_values(grid):
     assert len(values) == 81
     return dict(zip(boxes, values))
 
+@_uses_tables
 def display(values):
     """
     Display the values as a 2-D grid.
@@ -74,6 +158,8 @@ def display(values):
         if r in 'CF': print(line)
     return
 
+@register_strategy('eliminate', 1)
+@_uses_tables
 def eliminate(values):
     """Eliminate values from peers of each box with a single value.
 
@@ -92,6 +178,8 @@ def eliminate(values):
             values = assign_value(values, peer, values[peer].replace(digit, ''))
     return values
 
+@register_strategy('only_choice', 2)
+@_uses_tables
 def only_choice(values):
     """Finalize all values that are the only choice for a unit.
 
@@ -108,44 +196,6 @@ def only_choice(values):
                 values = assign_value(values, dplaces[0], digit)
     return values
 
-def find_twins(values, box_pairs):
-    """Determine all the naked twins that exist on the Sudoku.
-    
-    Input: Sudoku in dictionary form and all boxes with length of two.
-    Output: Resulting naked twins dictionary.
-    """
-    naked_twins = dict()
-    for twin_box in box_pairs:
-        boxes = peers[twin_box]
-        pairs = box_pairs & boxes
-        # Define a dictionary to determine if there are pairs with same value in the
-        # same unit. The key of the dictionary is the numeric value of a box and the
-        # dictionary value will be a list of the boxes. Such as {'27':['H1', 'A1']}.
-        value_boxes = dict()
-        value_boxes[values[twin_box]] = list()
-        value_boxes[values[twin_box]].append(twin_box)
-        for box in pairs:
-            value = values[box]
-            if value not in value_boxes:
-                value_boxes[value] = list()
-                value_boxes[value].append(box)
-            else:
-                value_boxes[value].append(box)
-        # From the dictionary built above determine if there are naked twins.
-        # The key of the dictionary will be a pair of boxes sorted such as "A1H1"
-        # and the value will be a sorted list of such boxes like (['A1', 'H1']).
-        for value in value_boxes:
-            if len(value_boxes[value]) == 2:
-                pairs = sorted(value_boxes[value])
-                size_diag_one = len(diag_one & set(pairs))
-                size_diag_two = len(diag_two & set(pairs))
-                key = pairs[0] + pairs[1]
-                # This rule determine if are naked pairs if two boxes belongs to the same row, column or diagonal.
-                if key not in naked_twins and (pairs[0][0] == pairs[1][0] or pairs[0][1] == pairs[1][1]
-                                               or size_diag_one == 2 or size_diag_two == 2):
-                    naked_twins[key] = pairs
-    return naked_twins
-
 def eliminate_digits(values, digits, boxes):
     """Eliminate all the provided digits from the provided boxes.
 
@@ -156,107 +206,310 @@ def eliminate_digits(values, digits, boxes):
             values = assign_value(values, box, values[box].replace(digit, ''))
     return values
 
-def eliminate_twins_units(values, twin_boxes):
-    """Eliminate all the naked twins on Sudoku.
-
-    Input: Sudoku in dictionary form and the naked twins that need to be eliminated in the Sudoku.
-    Output: Resulting Sudoku in dictionary form after eliminating naked twins.
-    """
-    for key in twin_boxes:
-        # Extract the pair of naked twins that will be used
-        twins = twin_boxes[key]
-        box_one = twins[0]
-        box_two = twins[1]
-        # Determine the boxes that needs to be updated
-        boxes_1 = peers[box_one]
-        boxes_2 = peers[box_two]
-        all_boxes = boxes_1 & boxes_2
-        # Update boxes with length greater than one
-        boxes = [box for box in all_boxes if len(values[box]) > 1]
-        # Determine the digits that needs to be eliminated
-        digits = values[box_one]
-        values = eliminate_digits(values, digits, boxes)
-    return values
-
+@register_strategy('naked_twins', 3)
+@_uses_tables
 def naked_twins(values):
     """Eliminate values using the naked twins strategy.
+
+    Twins are found with an index, per unit, from each two-digit value to the boxes of the
+    unit holding it, covering rows, columns, squares and diagonals. The index starts with
+    the boxes that hold two digits, and every box an elimination leaves with two digits is
+    added to it, so after the first pass only the units of changed boxes are looked at
+    again. The digits of a pair of twins are eliminated from every box that is a peer of both.
+
     Args:
         values(dict): a dictionary of the form {'box_name': '123456789', ...}
 
     Returns:
         the values dictionary with the naked twins eliminated from peers.
     """
-    pair_boxes = list()
-    # Find all the boxes with length of two
-    for box in boxes:
-        if len(values[box]) == 2:
-            pair_boxes.append(box)
-    # Remove all the duplicate boxes
-    pair_boxes = set(pair_boxes)
-    # Determine the proper naked twins
-    naked_twins = find_twins(values, pair_boxes)
-    # Eliminate all the naked twins from the Sudoku
-    eliminate_twins_units(values, naked_twins)
+    # {(unit number, two-digit value): boxes of the unit holding that value}
+    index = dict()
+    pending = [box for box in boxes if len(values[box]) == 2]
+    while pending:
+        box = pending.pop()
+        value = values[box]
+        if len(value) != 2:
+            continue
+        for u in box_units[box]:
+            holders = index.setdefault((u, value), [])
+            if box in holders:
+                continue
+            holders.append(box)
+            if len(holders) != 2:
+                continue
+            for peer in peers[holders[0]] & peers[box]:
+                old = values[peer]
+                if len(old) > 1 and (value[0] in old or value[1] in old):
+                    if len(old) == 2:
+                        # The box leaves the index under its old value.
+                        for v in box_units[peer]:
+                            stale = index.get((v, old))
+                            if stale and peer in stale:
+                                stale.remove(peer)
+                    new = old.replace(value[0], '').replace(value[1], '')
+                    values = assign_value(values, peer, new)
+                    if len(new) == 2:
+                        pending.append(peer)
+    return values
+
+@_uses_tables
+def naked_subsets(values, size):
+    """Eliminate the digits of every group of `size` boxes of a unit that together hold only `size` digits.
+
+    Input: Sudoku in dictionary form and the size of the groups.
+    Output: Resulting Sudoku in dictionary form.
+    """
+    for unit in all_units:
+        candidates = [box for box in unit if 1 < len(values[box]) <= size]
+        for group in itertools.combinations(candidates, size):
+            digits = set(''.join(values[box] for box in group))
+            if len(digits) == size:
+                others = [box for box in unit if box not in group and len(values[box]) > 1]
+                values = eliminate_digits(values, digits, others)
+    return values
+
+@_uses_tables
+def hidden_subsets(values, size):
+    """Restrict every group of `size` boxes of a unit that are the only places for `size` digits to those digits.
+
+    Input: Sudoku in dictionary form and the size of the groups.
+    Output: Resulting Sudoku in dictionary form.
+    """
+    for unit in all_units:
+        places = dict()
+        for digit in '123456789':
+            dplaces = [box for box in unit if digit in values[box]]
+            if 1 < len(dplaces) <= size:
+                places[digit] = dplaces
+        for digits in itertools.combinations(sorted(places), size):
+            group = set(box for digit in digits for box in places[digit])
+            if len(group) == size:
+                for box in group:
+                    values = assign_value(values, box, ''.join(d for d in values[box] if d in digits))
     return values
 
-def reduce_puzzle(values):
+def eliminate_intersections(values, pairs):
+    """Eliminate a digit from the rest of a unit when another unit can only place it in their intersection.
+
+    Input: Sudoku in dictionary form and (unit, other unit, shared boxes) tuples.
+    Output: Resulting Sudoku in dictionary form.
     """
-    Iterate eliminate() and only_choice(). If at some point, there is a box with no available values, return False.
-    If the sudoku is solved, return the sudoku.
-    If after an iteration of both functions, the sudoku remains the same, return the sudoku.
-    Input: A sudoku in dictionary form.
+    for unit, other, shared in pairs:
+        for digit in '123456789':
+            dplaces = [box for box in unit if digit in values[box]]
+            if len(dplaces) > 1 and all(box in shared for box in dplaces):
+                others = [box for box in other if box not in shared and len(values[box]) > 1]
+                values = eliminate_digits(values, digit, others)
+    return values
+
+@register_strategy('pointing_pairs', 4)
+@_uses_tables
+def pointing_pairs(values):
+    """Eliminate a digit from a row, column or diagonal when a square can only place it on that line."""
+    return eliminate_intersections(values, intersections)
+
+@register_strategy('box_line_reduction', 4)
+@_uses_tables
+def box_line_reduction(values):
+    """Eliminate a digit from a square when a row, column or diagonal can only place it inside that square."""
+    return eliminate_intersections(values, [(line, square, shared) for square, line, shared in intersections])
+
+@register_strategy('hidden_pairs', 5)
+def hidden_pairs(values):
+    """Restrict pairs of boxes that are the only places for two digits of a unit to those digits."""
+    return hidden_subsets(values, 2)
+
+@register_strategy('naked_triples', 6)
+def naked_triples(values):
+    """Eliminate the digits of three boxes of a unit that together hold only three digits from the rest of it."""
+    return naked_subsets(values, 3)
+
+@register_strategy('hidden_triples', 7)
+def hidden_triples(values):
+    """Restrict triples of boxes that are the only places for three digits of a unit to those digits."""
+    return hidden_subsets(values, 3)
+
+def profile_strategy(stats, name, strategy, values):
+    """Run a strategy on the values, adding its time and eliminations to stats.
+
+    Input: A stats.SolverStats, the strategy name, the strategy function and a Sudoku in dictionary form.
+    Output: The Sudoku returned by the strategy.
+    """
+    before = sum(len(value) for value in values.values())
+    start = time.perf_counter()
+    values = strategy(values)
+    stats.strategy(name, time.perf_counter() - start, before - sum(len(value) for value in values.values()))
+    return values
+
+def reduce_puzzle(values, stats=None, pipeline=None):
+    """
+    Run the registered strategies, cheapest first, until none of them can remove a candidate.
+    Whenever a strategy makes progress, start again from the cheapest one, so expensive
+    strategies only run once the cheap ones are stuck.
+    If at some point, there is a box with no available values, return False.
+    Input: A sudoku in dictionary form, optional stats.SolverStats to profile the strategies in
+        and an optional list of strategy names to run instead of all registered ones.
     Output: The resulting sudoku in dictionary form.
     """
-    solved_values = [box for box in values.keys() if len(values[box]) == 1]
-    stalled = False
-    while not stalled:
-        solved_values_before = len([box for box in values.keys() if len(values[box]) == 1])
-        values = eliminate(values)
-        values = only_choice(values)
-        values = naked_twins(values)
-        solved_values_after = len([box for box in values.keys() if len(values[box]) == 1])
-        stalled = solved_values_before == solved_values_after
-        if len([box for box in values.keys() if len(values[box]) == 0]):
+    pipeline = strategy_pipeline(pipeline)
+    candidates = sum(len(value) for value in values.values())
+    level = 0
+    while level < len(pipeline):
+        name, strategy = pipeline[level]
+        if stats is None:
+            values = strategy(values)
+        else:
+            values = profile_strategy(stats, name, strategy, values)
+        if not all(values.values()):
             return False
+        remaining = sum(len(value) for value in values.values())
+        level = 0 if remaining < candidates else level + 1
+        candidates = remaining
     return values
 
-def search(values):
-    "Using depth-first search and propagation, try all possible values."
-    # First, reduce the puzzle using the previous function
-    values = reduce_puzzle(values)
-    if values is False:
-        return False  ## Failed earlier
-    if all(len(values[s]) == 1 for s in boxes):
-        return values  ## Solved!
-    # Choose one of the unfilled squares with the fewest possibilities
-    n, s = min((len(values[s]), s) for s in boxes if len(values[s]) > 1)
-    # Now use recurrence to solve each one of the resulting sudokus, and
-    for value in values[s]:
-        new_sudoku = values.copy()
-        new_sudoku[s] = value
-        attempt = search(new_sudoku)
-        if attempt:
-            return attempt
-
-def solve(grid):
+@_uses_tables
+def search(values, stats=None, depth=0, cancelled=None):
+    """Using depth-first search and propagation, try all possible values.
+
+    The search keeps its own stack of partially explored sudokus instead of recursing,
+    so its depth is not bounded by the Python recursion limit.
+
+    Input: A sudoku in dictionary form, optional stats.SolverStats to count the work in, the
+        depth of the sudoku in the search tree and an optional function, called once per
+        node, that returns True to abandon the search, such as a budget.Budget.
+    Output: The solved sudoku in dictionary form, or False if there is no solution or
+        the search was abandoned.
+    """
+    recorder = tracing.active()
+    # One [reduced sudoku, branching box, values left to try, depth, recorder mark] frame
+    # for every sudoku between the root and the current one.
+    stack = []
+    while True:
+        if cancelled is not None and cancelled():
+            return False
+        if stats is not None:
+            stats.nodes += 1
+            candidates = sum(len(values[s]) for s in boxes)
+        # First, reduce the puzzle using the previous function
+        values = reduce_puzzle(values, stats)
+        if values is not False:
+            if stats is not None:
+                stats.propagations += candidates - sum(len(values[s]) for s in boxes)
+            if all(len(values[s]) == 1 for s in boxes):
+                return values  ## Solved!
+            # Choose one of the unfilled squares with the fewest possibilities
+            n, s = min((len(values[s]), s) for s in boxes if len(values[s]) > 1)
+            stack.append([values, s, list(reversed(values[s])), depth, None])
+        else:
+            if stats is not None:
+                stats.contradiction(depth)
+            # Backtrack to the deepest sudoku that still has a value to try
+            while stack:
+                frame = stack[-1]
+                if stats is not None:
+                    stats.backtracks += 1
+                if recorder is not None:
+                    # Undo the abandoned branch so the recorded deltas replay correctly
+                    recorder.rewind(frame[4])
+                if frame[2]:
+                    break
+                stack.pop()
+            else:
+                return False
+        parent, s, choices, depth, _ = frame = stack[-1]
+        value = choices.pop()
+        frame[4] = recorder.mark() if recorder is not None else None
+        values = assign_value(parent.copy(), s, value)
+        depth += 1
+        if stats is not None:
+            stats.branch(s, value, depth)
+
+def solve(grid, engine='bitboard', recorder=None, stats=None, topology=None, timeout=None, max_nodes=None,
+          token=None, table=None):
     """
     Find the solution to a Sudoku grid.
     Args:
         grid(string): a string representing a sudoku grid.
             Example: '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        engine(string): 'bitboard' to use the bitmask engine in bitboard.py, 'dlx' to use
+            Dancing Links from dlx.py, or 'dict' to use the dictionary functions in this module.
+        recorder(tracing.Recorder): optional recorder for the changes made while solving.
+            Tracing is off unless a recorder is passed here or already active.
+        stats(stats.SolverStats): optional counters and profiling hooks for the work done
+            by the engine. Leaving it out costs nothing.
+        topology(topology.Topology): board shape for the bitboard and dlx engines, such as
+            topology.get(4) for 16x16 boards. Defaults to the diagonal 9x9 board.
+        timeout(float): optional number of seconds the search may run for.
+        max_nodes(int): optional number of search nodes the search may visit.
+        token(budget.CancellationToken): optional token to cancel the search with.
+        table(transposition.TranspositionTable): optional memory of dead ends for the bitboard
+            engine's search, which may be shared by several solves.
     Returns:
         The dictionary representation of the final sudoku grid. False if no solution exists.
+        A budget.Exhausted, which is also falsy, if the timeout, the node limit or the token
+        stopped the search first.
     """
-    return search(grid_values(grid))
+    import bitboard
+    if table is not None and engine != 'bitboard':
+        raise ValueError('Only the bitboard engine uses a transposition table')
+    limits = None
+    if timeout is not None or max_nodes is not None or token is not None:
+        import budget
+        limits = budget.Budget(timeout, max_nodes, token)
+    with tracing.recording(recorder):
+        if engine == 'dict':
+            if topology is not None:
+                raise ValueError('The dict engine only solves the diagonal 9x9 board')
+            values = grid_values(grid)
+            active = tracing.active()
+            if active is not None:
+                active.start(values)
+            result = search(values, stats, cancelled=limits)
+        elif engine == 'bitboard':
+            result = bitboard.solve(grid, stats, topology or bitboard.STANDARD, limits, table)
+        elif engine == 'dlx':
+            import dlx
+            result = dlx.solve(grid, stats, topology or bitboard.STANDARD, limits)
+        else:
+            raise ValueError('Unknown engine: {}'.format(engine))
+    if limits is not None and limits.reason is not None and not result:
+        topology = topology or bitboard.STANDARD
+        reduced = bitboard.reduce_puzzle(bitboard.grid_board(grid, topology), topology=topology)
+        values = reduced and bitboard.board_values(reduced, topology)
+        return budget.Exhausted(limits.reason, values, limits.nodes, limits.elapsed(), stats)
+    return result
+
+def count_solutions(grid, limit=2):
+    """
+    Count the solutions of a Sudoku grid, stopping as soon as limit of them are found.
+    Args:
+        grid(string): a string representing a sudoku grid.
+        limit(int): number of solutions to stop at, or None to count all of them.
+    Returns:
+        The number of solutions found, at most limit.
+    """
+    import bitboard
+    return bitboard.count_solutions(bitboard.grid_board(grid), limit)
+
+def is_unique(grid):
+    """Return True if the Sudoku grid has exactly one solution."""
+    return count_solutions(grid, 2) == 1
 
 if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1:
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
+
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
-    display(solve(diag_sudoku_grid))
+    recorder = tracing.Recorder()
+    display(solve(diag_sudoku_grid, recorder=recorder))
 
     try:
         from visualize import visualize_assignments
 
-        visualize_assignments(assignments)
+        visualize_assignments(recorder)
 
     except SystemExit:
         pass
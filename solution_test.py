@@ -1,4 +1,7 @@
+import os
 import solution
+import subprocess
+import sys
 import unittest
 
 
@@ -75,6 +78,27 @@ class TestNakedTwins(unittest.TestCase):
         self.assertTrue(solution.naked_twins(self.before_naked_twins_2) in self.possible_solutions_2,
                        "Your naked_twins function produced an unexpected board.")
 
+    def test_square_and_diagonal_twins(self):
+        values = dict((box, '123456789') for box in solution.boxes)
+        values.update({'A2': '12', 'B1': '12', 'A1': '34', 'I9': '34'})
+        values = solution.naked_twins(values)
+        # Twins in a square only, and twins in a diagonal only.
+        self.assertEqual(values['C1'], '3456789')
+        self.assertEqual(values['E5'], '1256789')
+        self.assertEqual(values['C3'], '56789')
+        # Peers of only one of the twins keep their digits.
+        self.assertEqual(values['A3'], '3456789')
+        self.assertEqual(values['D1'], '123456789')
+
+    def test_cascading_twins(self):
+        values = dict((box, '123456789') for box in solution.boxes)
+        # Removing the A1/A2 twins from A3 and B3 makes them twins of column 3.
+        values.update({'A1': '12', 'A2': '12', 'A3': '1256', 'B3': '1256'})
+        values = solution.naked_twins(values)
+        self.assertEqual(values['A3'], '56')
+        self.assertEqual(values['I3'], '1234789')
+        self.assertEqual(values['I2'], '123456789')
+
 class TestDiagonalSudoku(unittest.TestCase):
     diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     solved_diag_sudoku = {'G7': '8', 'G6': '9', 'G5': '7', 'G4': '3', 'G3': '2', 'G2': '4', 'G1': '6', 'G9': '5',
@@ -92,5 +116,113 @@ class TestDiagonalSudoku(unittest.TestCase):
     def test_solve(self):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
+class TestStrategies(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_pipeline_order(self):
+        names = [name for name, _ in solution.strategy_pipeline()]
+        self.assertEqual(names[:3], ['eliminate', 'only_choice', 'naked_twins'])
+        self.assertEqual([name for name, _ in solution.strategy_pipeline(['hidden_pairs', 'eliminate'])],
+                         ['eliminate', 'hidden_pairs'])
+
+    def test_hidden_pairs(self):
+        values = dict((box, '123456789') for box in solution.boxes)
+        for box in solution.row_units[0][2:]:
+            values[box] = '3456789'
+        values = solution.hidden_pairs(values)
+        self.assertEqual(values['A1'], '12')
+        self.assertEqual(values['A2'], '12')
+
+    def test_naked_triples(self):
+        values = dict((box, '123456789') for box in solution.boxes)
+        values['A1'], values['A2'], values['A3'] = '12', '23', '13'
+        values = solution.naked_triples(values)
+        self.assertEqual(values['A9'], '456789')
+        self.assertEqual(values['B1'], '456789')
+        self.assertEqual(values['A1'], '12')
+
+    def test_pointing_pairs(self):
+        values = dict((box, '123456789') for box in solution.boxes)
+        for box in solution.square_units[0]:
+            if box[0] != 'A':
+                values[box] = '23456789'
+        values = solution.pointing_pairs(values)
+        self.assertEqual(values['A9'], '23456789')
+        self.assertEqual(values['A1'], '123456789')
+
+    def test_box_line_reduction(self):
+        values = dict((box, '123456789') for box in solution.boxes)
+        for box in solution.row_units[0][3:]:
+            values[box] = '23456789'
+        values = solution.box_line_reduction(values)
+        self.assertEqual(values['B1'], '23456789')
+        self.assertEqual(values['A1'], '123456789')
+
+    def test_stronger_than_basic_strategies(self):
+        grid = '.....52........4.16..7.........6.1..93.4............3..8.3....4......3.....5...1.'
+        full = solution.reduce_puzzle(solution.grid_values(grid))
+        basic = solution.reduce_puzzle(solution.grid_values(grid), pipeline=['eliminate', 'only_choice', 'naked_twins'])
+        self.assertTrue(sum(map(len, full.values())) < sum(map(len, basic.values())))
+
+class TestCountSolutions(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_unique(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid), 1)
+        self.assertTrue(solution.is_unique(self.diagonal_grid))
+
+    def test_limit(self):
+        self.assertEqual(solution.count_solutions('.' * 81, limit=5), 5)
+        self.assertFalse(solution.is_unique('.' * 81))
+
+    def test_unsolvable(self):
+        self.assertEqual(solution.count_solutions('11' + '.' * 79), 0)
+        self.assertFalse(solution.is_unique('11' + '.' * 79))
+
+    def test_count_all(self):
+        grid = ''.join(TestDiagonalSudoku.solved_diag_sudoku[box] for box in solution.boxes)
+        self.assertEqual(solution.count_solutions(grid[:-1] + '.', limit=None), 1)
+
+class TestLazyTables(unittest.TestCase):
+
+    def test_import_builds_nothing(self):
+        code = 'import solution, bitboard; print("peers" in vars(solution), "units" in vars(bitboard.STANDARD))'
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(output.split(), [b'False', b'False'])
+
+    def test_strategies_build_tables(self):
+        # Every strategy, and diag_peers, must work as the first thing called in a fresh interpreter.
+        grid = TestDiagonalSudoku.diagonal_grid
+        code = ('import solution, sys\n'
+                'for name in sorted(solution.strategies):\n'
+                '    sys.modules.pop("solution")\n'
+                '    import solution\n'
+                '    values = dict((solution.cross("ABCDEFGHI", "123456789")[i], "123456789" if c == "." else c)\n'
+                '                  for i, c in enumerate({!r}))\n'
+                '    assert not solution._tables_built\n'
+                '    solution.strategies[name][1](values)\n'
+                '    solution.reduce_puzzle(values, pipeline=[name])\n'
+                'sys.modules.pop("solution")\n'
+                'import solution\n'
+                'peers = dict((box, set()) for box in solution.cross("ABCDEFGHI", "123456789"))\n'
+                'assert len(solution.diag_peers(peers)["A1"]) == 8\n'
+                'print("ok")\n').format(grid)
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(output.split(), [b'ok'])
+
+    def test_star_import(self):
+        code = ('from solution import *\n'
+                'from bitboard import *\n'
+                'print(len(boxes), len(unitlist), len(peers["A1"]), BIT_COUNT[7], len(UNITS))\n')
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(output.split(), [b'81', b'27', b'26', b'3', b'29'])
+
+    def test_tables(self):
+        self.assertEqual(len(solution.boxes), 81)
+        self.assertEqual(len(solution.peers['A1']), 26)
+        self.assertEqual(len(solution.peers['A2']), 20)
+        self.assertIn(solution.row_units[0], solution.units['A1'])
+        self.assertRaises(AttributeError, getattr, solution, 'no_such_table')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,160 @@
+"""Solve one hard Sudoku faster by searching its subtrees in parallel.
+
+bitboard.search() tries one branch after another, so a single very hard puzzle
+keeps a single CPU busy however many are available. A SpeculativeSolver expands
+the top levels of the search tree in this process, in the order the sequential
+search would visit them, and hands the resulting subtrees to a pool of worker
+processes.
+
+The workers share a single integer, the limit: a worker abandons its subtree
+as soon as the subtree's index is not below the limit any more. Once a subtree
+is solved the limit drops to 0, cancelling every other worker, or in
+deterministic mode to the index of that subtree, cancelling only the subtrees
+the sequential search would have visited later. Deterministic mode therefore
+returns the same solution as bitboard.solve(), at the cost of waiting for the
+earlier subtrees to finish.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+
+import bitboard
+import topology as topologies
+import tracing
+
+# The limit shared with the parent, set in each worker by _init_worker().
+_limit = None
+
+
+def _init_worker(limit):
+    global _limit
+    tracing.deactivate()
+    _limit = limit
+
+
+def _search_subtree(index, board, changed, shape):
+    topology = topologies.get(*shape)
+    return index, bitboard.search(board, changed, topology=topology, cancelled=lambda: _limit.value <= index)
+
+
+def expand(board, width, max_depth=6, topology=bitboard.STANDARD):
+    """Split the search tree of a board into independent subtrees.
+
+    Whole levels of the tree are expanded until there are at least width subtrees or
+    max_depth levels have been expanded. Branches that propagate to a contradiction
+    are dropped.
+
+    Input: A board, the number of subtrees wanted, the maximum number of levels to
+        expand and the topology of the board.
+    Output: A list of (board, changed) subtrees, in the order bitboard.search() visits
+        them, where changed are the boxes to propagate first as in bitboard.search().
+    """
+    subtrees = [(board, None)]
+    for _ in range(max_depth):
+        if len(subtrees) >= width:
+            break
+        expanded = []
+        branched = False
+        for board, changed in subtrees:
+            board = bitboard.propagate(board, range(len(board)) if changed is None else changed, topology=topology)
+            if board is False:
+                continue
+            cell = bitboard.choose_cell(board, topology)
+            if cell is None:
+                expanded.append((board, ()))
+                continue
+            branched = True
+            for bit in topology.single_bits:
+                if board[cell] & bit:
+                    child = board[:]
+                    child[cell] = bit
+                    expanded.append((child, (cell,)))
+        subtrees = expanded
+        if not branched:
+            break
+    return subtrees
+
+
+class SpeculativeSolver(object):
+    """A pool of worker processes searching the subtrees of one puzzle at a time.
+
+    Args:
+        workers(int): number of worker processes, defaults to the number of CPUs.
+            With workers=1 puzzles are searched sequentially in this process.
+        deterministic(bool): return the solution the sequential search finds.
+        width(int): number of subtrees to split a puzzle into, 4 per worker by default.
+        topology(topology.Topology): shape of the boards to solve.
+    """
+
+    def __init__(self, workers=None, deterministic=False, width=None, topology=bitboard.STANDARD):
+        self.workers = workers or os.cpu_count() or 1
+        self.deterministic = deterministic
+        self.width = width or 4 * self.workers
+        self.topology = topology
+        self._limit = None
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def search(self, board):
+        """Search a board across the workers.
+
+        Input: A board as produced by bitboard.grid_board().
+        Output: The solved board, or False if there is no solution.
+        """
+        if self.workers == 1:
+            return bitboard.search(board, topology=self.topology)
+        subtrees = expand(board, self.width, topology=self.topology)
+        if not subtrees:
+            return False
+        if self._executor is None:
+            self._limit = multiprocessing.RawValue('l', 0)
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(self._limit,))
+        limit = self._limit
+        limit.value = len(subtrees)
+        shape = (self.topology.box_size, self.topology.diagonal)
+        futures = [self._executor.submit(_search_subtree, index, board, changed, shape)
+                   for index, (board, changed) in enumerate(subtrees)]
+        solved = False
+        # Wait for every subtree, so that no worker is still busy with this puzzle
+        # when the limit is reset for the next one. Cancelled workers stop within a node.
+        for future in concurrent.futures.as_completed(futures):
+            index, board = future.result()
+            if board is not False and index < limit.value:
+                solved = board
+                limit.value = index if self.deterministic else 0
+        return solved
+
+    def solve(self, grid):
+        """Find the solution to a Sudoku grid.
+
+        Args:
+            grid(string): a string representing a sudoku grid.
+        Returns:
+            The dictionary representation of the final sudoku grid. False if no solution exists.
+        """
+        board = self.search(bitboard.grid_board(grid, self.topology))
+        if board is False:
+            return False
+        return bitboard.board_values(board, self.topology)
+
+
+def solve(grid, workers=None, deterministic=False):
+    """Solve a single grid with a SpeculativeSolver that is shut down afterwards.
+
+    Starting the worker processes is expensive, so to solve several hard puzzles
+    keep one SpeculativeSolver open instead.
+    """
+    with SpeculativeSolver(workers, deterministic) as solver:
+        return solver.solve(grid)
@@ -0,0 +1,58 @@
+import bitboard
+import os
+import solution_test
+import speculative
+import unittest
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpora', 'hard.txt')) as corpus:
+    HARD = [line.strip() for line in corpus if line.strip()][:3]
+
+
+class TestExpand(unittest.TestCase):
+
+    def test_order_matches_search(self):
+        grid = HARD[0]
+        subtrees = speculative.expand(bitboard.grid_board(grid), 8)
+        self.assertTrue(len(subtrees) >= 8)
+        solutions = [bitboard.search(board, changed) for board, changed in subtrees]
+        first = next(board for board in solutions if board)
+        self.assertEqual(bitboard.board_values(first), bitboard.solve(grid))
+
+    def test_unsolvable(self):
+        self.assertEqual(speculative.expand(bitboard.grid_board('11' + '.' * 79), 8), [])
+
+
+class TestSpeculativeSolver(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.solver = speculative.SpeculativeSolver(workers=2, deterministic=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.solver.close()
+
+    def test_deterministic(self):
+        # A sparse grid has many solutions, so only the search order decides which one is found.
+        for grid in [HARD[0][:20] + '.' * 61] + HARD:
+            self.assertEqual(self.solver.solve(grid), bitboard.solve(grid))
+
+    def test_unsolvable(self):
+        self.assertFalse(self.solver.solve('11' + '.' * 79))
+        self.assertFalse(self.solver.solve('.23456789' + '1' + '.' * 71))
+
+    def test_first_solution(self):
+        grid = HARD[0][:20] + '.' * 61
+        values = speculative.solve(grid, workers=2)
+        for i, c in enumerate(grid):
+            if c != '.':
+                self.assertEqual(values[bitboard.boxes[i]], c)
+        self.assertEqual(bitboard.count_solutions(bitboard.values_board(values)), 1)
+
+    def test_single_worker(self):
+        grid = solution_test.TestDiagonalSudoku.diagonal_grid
+        self.assertEqual(speculative.solve(grid, workers=1), solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Optional instrumentation of the work the solver engines do.
+
+Pass a SolverStats to solution.solve() to have the engine fill it in. The
+engines only touch it when one is passed, so leaving it out costs nothing;
+sample() makes it easy to instrument only a fraction of production solves.
+A SolverStats can be reused across several solves to accumulate totals.
+"""
+import random
+
+
+class SolverStats(object):
+    """Work counters and profiling hooks for one or more solves.
+
+    Attributes:
+        nodes: search nodes visited, including the root.
+        backtracks: branches that failed and were abandoned.
+        max_depth: deepest branch taken, the root being depth 0.
+        propagations: candidates removed by constraint propagation (for the
+            Dancing Links engine, constraint columns covered).
+        strategies: {name: {'time': seconds, 'eliminations': candidates removed}}
+            for each propagation strategy the engine ran, such as 'eliminate',
+            'only_choice' and 'naked_twins'.
+        on_branch: optional callable(box, digit, depth) called before each branch.
+        on_contradiction: optional callable(depth) called when a search node turns
+            out to have no solution.
+    """
+
+    def __init__(self, on_branch=None, on_contradiction=None):
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.propagations = 0
+        self.strategies = {}
+        self.on_branch = on_branch
+        self.on_contradiction = on_contradiction
+
+    def strategy(self, name, seconds, eliminations):
+        """Add the time and eliminations of one run of a strategy."""
+        entry = self.strategies.get(name)
+        if entry is None:
+            entry = self.strategies[name] = {'time': 0.0, 'eliminations': 0}
+        entry['time'] += seconds
+        entry['eliminations'] += eliminations
+
+    def branch(self, box, digit, depth):
+        """Record that the search is about to try digit in box at the given depth."""
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.on_branch is not None:
+            self.on_branch(box, digit, depth)
+
+    def contradiction(self, depth):
+        """Record that the search node at the given depth has no solution."""
+        if self.on_contradiction is not None:
+            self.on_contradiction(depth)
+
+    def as_dict(self):
+        """Return the counters, without the hooks, as plain data."""
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'propagations': self.propagations,
+            'strategies': dict((name, dict(entry)) for name, entry in self.strategies.items()),
+        }
+
+
+def sample(rate, on_branch=None, on_contradiction=None):
+    """Return a SolverStats for a fraction rate of the calls, and None for the rest.
+
+    Example: solution.solve(grid, stats=stats.sample(0.01))
+    """
+    if rate >= 1 or random.random() < rate:
+        return SolverStats(on_branch, on_contradiction)
+    return None
@@ -0,0 +1,38 @@
+import os
+import solution
+import stats
+import unittest
+
+
+class TestSolverStats(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(os.path.dirname(__file__), 'corpora', 'diagonal.txt')) as puzzles:
+            self.grid = puzzles.readline().strip()
+
+    def test_counters_and_hooks(self):
+        for engine in ('bitboard', 'dlx', 'dict'):
+            branches, contradictions = [], []
+            counters = stats.SolverStats(lambda box, digit, depth: branches.append(depth), contradictions.append)
+            self.assertEqual(solution.solve(self.grid, engine=engine, stats=counters), solution.solve(self.grid))
+            self.assertEqual(counters.nodes, len(branches) + 1, engine)
+            self.assertEqual(counters.max_depth, max(branches), engine)
+            self.assertTrue(counters.backtracks > 0, engine)
+            self.assertTrue(len(contradictions) > 0, engine)
+            self.assertTrue(counters.propagations > 0, engine)
+
+    def test_strategies(self):
+        for engine in ('bitboard', 'dict'):
+            counters = stats.SolverStats()
+            solution.solve(self.grid, engine=engine, stats=counters)
+            profile = counters.as_dict()['strategies']
+            self.assertTrue(set(profile) >= set(['eliminate', 'naked_twins', 'only_choice']))
+            self.assertTrue(profile['eliminate']['eliminations'] > 0)
+            self.assertTrue(all(entry['time'] >= 0 for entry in profile.values()))
+
+    def test_sample(self):
+        self.assertIsNone(stats.sample(0))
+        self.assertIsInstance(stats.sample(1), stats.SolverStats)
+
+if __name__ == '__main__':
+    unittest.main()
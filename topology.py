@@ -0,0 +1,118 @@
+"""Board topologies for Sudoku variants of any box size.
+
+A Topology precomputes, for an N x N board made of sqrt(N) x sqrt(N) squares,
+the integer-indexed units, peers and candidate-mask lookup tables that the
+bitboard and Dancing Links engines work with. The standard 9 x 9 diagonal
+board is ``get(3, True)``; 4 x 4, 16 x 16 and 25 x 25 boards use box sizes 2,
+4 and 5, and the diagonal constraint can be switched off for plain Sudoku.
+
+Boxes are numbered row-major. Their names follow solution.boxes: a row letter
+followed by a column number ('A1', ..., 'P16' on a 16 x 16 board). Grids use
+'.' for empty boxes and the first N symbols of SYMBOLS as digits.
+"""
+SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+ROW_LABELS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Masks up to this many bits get tuple lookup tables; wider ones are computed on demand.
+MAX_TABLE_BITS = 16
+
+
+class _MaskTable(object):
+    """Stand-in for a lookup table indexed by mask, for masks too wide to tabulate."""
+
+    def __init__(self, function):
+        self.function = function
+
+    def __getitem__(self, mask):
+        return self.function(mask)
+
+
+class Topology(object):
+    """Units, peers and lookup tables of one board shape.
+
+    Only the sizes are set on construction; the tables are built on first access.
+
+    Attributes:
+        box_size: width of a square, 3 for the standard board.
+        size: number of digits and of boxes per unit (box_size ** 2).
+        diagonal: whether both main diagonals are units.
+        digits: the digit symbols, in bit order.
+        full: candidate mask of an empty box.
+        names: box names in index order; index maps a name back to its index.
+        units: tuples of box indexes: rows, columns, squares, then the diagonals.
+        peers: for each box, the sorted indexes of the boxes sharing a unit with it.
+        cell_units: for each box, the indexes in units of the units containing it.
+        bit_count: number of candidates, indexed by mask.
+        mask_digits: digit symbols of the candidates, indexed by mask.
+        digit_mask: mask of each digit symbol.
+        single_bits: the mask of each digit, in order.
+    """
+
+    def __init__(self, box_size=3, diagonal=True):
+        size = box_size * box_size
+        if size > len(SYMBOLS):
+            raise ValueError('Box size {} is too large'.format(box_size))
+        self.box_size = box_size
+        self.size = size
+        self.diagonal = diagonal
+        self.cells = size * size
+        self.digits = SYMBOLS[:size]
+        self.full = (1 << size) - 1
+
+    def __getattr__(self, name):
+        # Only reached for attributes that are not set yet: build the tables on first use.
+        if name.startswith('__') or 'units' in self.__dict__:
+            raise AttributeError(name)
+        self._build()
+        return getattr(self, name)
+
+    def _build(self):
+        """Compute the names, units, peers and lookup tables."""
+        size, box_size = self.size, self.box_size
+        self.names = tuple(ROW_LABELS[r] + str(c + 1) for r in range(size) for c in range(size))
+        self.index = dict((name, i) for i, name in enumerate(self.names))
+
+        lines = range(size)
+        units = [tuple(r * size + c for c in lines) for r in lines]
+        units += [tuple(r * size + c for r in lines) for c in lines]
+        for band in range(0, size, box_size):
+            for stack in range(0, size, box_size):
+                units.append(tuple((band + r) * size + stack + c for r in range(box_size) for c in range(box_size)))
+        if self.diagonal:
+            units.append(tuple(i * size + i for i in lines))
+            units.append(tuple(sorted(i * size + size - 1 - i for i in lines)))
+        cell_units = [[] for _ in range(self.cells)]
+        for u, unit in enumerate(units):
+            for i in unit:
+                cell_units[i].append(u)
+        self.cell_units = tuple(tuple(found) for found in cell_units)
+        self.peers = tuple(tuple(sorted(set(c for u in cell_units[i] for c in units[u]) - set([i])))
+                           for i in range(self.cells))
+
+        self.single_bits = tuple(1 << i for i in range(size))
+        self.digit_mask = dict(zip(self.digits, self.single_bits))
+        if size <= MAX_TABLE_BITS:
+            self.bit_count = tuple(bin(mask).count('1') for mask in range(self.full + 1))
+            self.mask_digits = tuple(self._digits_of(mask) for mask in range(self.full + 1))
+        else:
+            self.bit_count = _MaskTable(lambda mask: bin(mask).count('1'))
+            self.mask_digits = _MaskTable(self._digits_of)
+        # Set last: its presence marks the tables as built.
+        self.units = tuple(units)
+
+    def __repr__(self):
+        return 'Topology(box_size={}, diagonal={})'.format(self.box_size, self.diagonal)
+
+    def _digits_of(self, mask):
+        return ''.join(d for d, bit in zip(self.digits, self.single_bits) if mask & bit)
+
+
+_shared = {}
+
+
+def get(box_size=3, diagonal=True):
+    """Return the shared Topology for a box size, building it on first use."""
+    key = (box_size, bool(diagonal))
+    if key not in _shared:
+        _shared[key] = Topology(box_size, bool(diagonal))
+    return _shared[key]
@@ -0,0 +1,75 @@
+import bitboard
+import dlx
+import solution
+import solution_test
+import topology
+import unittest
+
+
+def is_valid(values, shape):
+    """Check that every unit of the topology holds every digit exactly once."""
+    for unit in shape.units:
+        if sorted(values[shape.names[i]] for i in unit) != sorted(shape.digits):
+            return False
+    return True
+
+
+class TestTopology(unittest.TestCase):
+
+    def test_standard_matches_bitboard(self):
+        shape = topology.get()
+        self.assertIs(shape, bitboard.STANDARD)
+        self.assertEqual(shape.names, tuple(solution.boxes))
+        self.assertEqual(len(shape.units), 29)
+        for i, box in enumerate(shape.names):
+            self.assertEqual(set(shape.names[p] for p in shape.peers[i]), solution.peers[box])
+
+    def test_sizes(self):
+        for box_size, diagonal, units, peers in [(2, True, 14, 9), (4, True, 50, 51), (5, False, 75, 64)]:
+            shape = topology.get(box_size, diagonal)
+            self.assertEqual(shape.cells, box_size ** 4)
+            self.assertEqual(len(shape.units), units)
+            self.assertEqual(len(shape.peers[0]), peers)
+            self.assertEqual(shape.full, (1 << shape.size) - 1)
+
+    def test_wide_masks(self):
+        shape = topology.get(5, False)
+        mask = shape.digit_mask['A'] | shape.digit_mask['P']
+        self.assertEqual(shape.bit_count[mask], 2)
+        self.assertEqual(shape.mask_digits[mask], 'AP')
+
+    def test_too_large(self):
+        self.assertRaises(ValueError, topology.Topology, 6)
+
+
+class TestSolveTopology(unittest.TestCase):
+
+    def test_solve_4x4(self):
+        shape = topology.get(2)
+        values = solution.solve('1...' + '....' + '....' + '...2', topology=shape)
+        self.assertEqual(values['A1'], '1')
+        self.assertTrue(is_valid(values, shape))
+
+    def test_solve_16x16(self):
+        shape = topology.get(4)
+        values = bitboard.solve('.' * shape.cells, topology=shape)
+        self.assertTrue(is_valid(values, shape))
+        self.assertTrue(is_valid(dlx.solve('.' * shape.cells, topology=shape), shape))
+
+    def test_plain_sudoku(self):
+        shape = topology.get(3, False)
+        grid = solution_test.TestDiagonalSudoku.diagonal_grid
+        values = solution.solve('.' * 81, engine='dlx', topology=shape)
+        self.assertTrue(is_valid(values, shape))
+        self.assertFalse(is_valid(values, topology.get()))
+        self.assertTrue(is_valid(solution.solve(grid, topology=shape), shape))
+
+    def test_unsolvable_4x4(self):
+        self.assertFalse(solution.solve('12..' + '..3.' + '....' + '....', topology=topology.get(2)))
+
+    def test_dict_engine_rejects_topology(self):
+        self.assertRaises(ValueError, solution.solve, '.' * 16, engine='dict', topology=topology.get(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Optional recording of the changes the solver makes while solving a grid.
+
+Tracing is off unless a Recorder is active, either by passing it to
+solution.solve() or by entering it as a context manager. A recorder is active
+in the thread or asyncio task that activated it only, so solves running
+elsewhere at the same time are not recorded in it. A recorder stores
+compact (box, old, new) deltas instead of board copies, so its memory grows
+with the number of changes rather than with changes times board size.
+"""
+import contextvars
+
+# The recorder the solver reports to, or None when tracing is off. A context
+# variable, so that a recorder only sees the solves of the thread or task that
+# activated it.
+_current = contextvars.ContextVar('recorder', default=None)
+
+
+def active():
+    """Return the active recorder, or None when tracing is off."""
+    return _current.get()
+
+
+def deactivate():
+    """Turn tracing off in the current context, such as a worker started from a traced solve."""
+    _current.set(None)
+
+
+class recording(object):
+    """Make recorder the active recorder for the duration of a with block.
+
+    A recorder of None leaves the active recorder, if any, untouched.
+    """
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self._token = None
+
+    def __enter__(self):
+        if self.recorder is None:
+            return _current.get()
+        self._token = _current.set(self.recorder)
+        return self.recorder
+
+    def __exit__(self, *exc_info):
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+
+
+class Recorder(object):
+    """Collects the (box, old, new) deltas of one solve."""
+
+    def __init__(self):
+        self.initial = None
+        self.deltas = []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+        self._token = None
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def start(self, values):
+        """Remember the board the deltas apply to and drop any earlier deltas."""
+        self.initial = dict(values)
+        del self.deltas[:]
+
+    def record(self, box, old, new):
+        self.deltas.append((box, old, new))
+
+    def mark(self):
+        """Return a position that rewind() can return the board to."""
+        return len(self.deltas)
+
+    def rewind(self, mark):
+        """Record the deltas that undo everything recorded after mark.
+
+        The search calls this when it abandons a branch, so that replaying the
+        deltas always reproduces the board the solver is actually working on.
+        Only the net change is undone, one delta per box that differs from its
+        value at mark, so that rewinding a chain of branches, whose deltas already
+        include the undo deltas of deeper rewinds, does not grow the log
+        exponentially.
+        """
+        # {box: [value at mark, current value]}, in the order the boxes first changed.
+        changes = {}
+        for box, old, new in self.deltas[mark:]:
+            change = changes.get(box)
+            if change is None:
+                changes[box] = [old, new]
+            else:
+                change[1] = new
+        self.deltas.extend((box, current, original) for box, (original, current) in reversed(changes.items())
+                           if current != original)
+
+    def replay(self):
+        """Apply the deltas one at a time to a copy of the initial board.
+
+        Yields:
+            (box, values) after each delta, where values is the board in dictionary
+            form. The same dictionary is updated in place, so copy it to keep it.
+        """
+        values = dict(self.initial)
+        for box, _, new in self.deltas:
+            values[box] = new
+            yield box, values
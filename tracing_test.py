@@ -0,0 +1,94 @@
+import benchmark
+import solution
+import solution_test
+import stats
+import threading
+import tracing
+import unittest
+
+
+class TestRecorder(unittest.TestCase):
+    grid = solution_test.TestDiagonalSudoku.diagonal_grid
+
+    def replay_last(self, recorder):
+        values = dict(recorder.initial)
+        for _, values in recorder.replay():
+            pass
+        return values
+
+    def test_replay_reaches_solution(self):
+        for engine in ('dict', 'bitboard'):
+            recorder = tracing.Recorder()
+            result = solution.solve(self.grid, engine=engine, recorder=recorder)
+            self.assertTrue(len(recorder) > 0)
+            self.assertEqual(self.replay_last(recorder), result)
+            self.assertIsNone(tracing.active())
+
+    def test_context_manager(self):
+        with tracing.Recorder() as recorder:
+            result = solution.solve(self.grid)
+        self.assertEqual(self.replay_last(recorder), result)
+        self.assertIsNone(tracing.active())
+
+    def test_rewind(self):
+        recorder = tracing.Recorder()
+        recorder.start({'A1': '123', 'A2': '45'})
+        recorder.record('A1', '123', '12')
+        mark = recorder.mark()
+        recorder.record('A1', '12', '1')
+        recorder.record('A2', '45', '4')
+        recorder.rewind(mark)
+        self.assertEqual(self.replay_last(recorder), {'A1': '12', 'A2': '45'})
+
+    def test_rewind_net_change(self):
+        recorder = tracing.Recorder()
+        recorder.start({'A1': '123', 'A2': '45'})
+        outer = recorder.mark()
+        recorder.record('A1', '123', '12')
+        inner = recorder.mark()
+        recorder.record('A1', '12', '1')
+        recorder.record('A2', '45', '4')
+        recorder.rewind(inner)
+        recorder.record('A1', '12', '2')
+        recorder.rewind(outer)
+        self.assertEqual(recorder.deltas[-1:], [('A1', '2', '123')])
+        self.assertEqual(self.replay_last(recorder), {'A1': '123', 'A2': '45'})
+
+    def test_log_bounded_by_nodes(self):
+        # Rewinding a chain of branches must not re-record the undo deltas of deeper rewinds.
+        grid = benchmark.load_corpus('hard')[2]
+        for engine in ('dict', 'bitboard'):
+            recorder = tracing.Recorder()
+            counters = stats.SolverStats()
+            result = solution.solve(grid, engine=engine, recorder=recorder, stats=counters)
+            self.assertTrue(len(recorder) <= counters.nodes * 81)
+            self.assertEqual(self.replay_last(recorder), result)
+
+    def test_threads(self):
+        # A solve in another thread must not report to this thread's recorder.
+        grids = benchmark.load_corpus('hard')[:3]
+        stop = threading.Event()
+
+        def solve_others():
+            while not stop.is_set():
+                for grid in grids:
+                    solution.solve(grid, engine='dict')
+
+        other = threading.Thread(target=solve_others)
+        other.start()
+        try:
+            for engine in ('dict', 'bitboard'):
+                recorder = tracing.Recorder()
+                result = solution.solve(self.grid, engine=engine, recorder=recorder)
+                self.assertEqual(self.replay_last(recorder), result)
+        finally:
+            stop.set()
+            other.join()
+
+    def test_off_by_default(self):
+        values = {'A1': '12'}
+        solution.assign_value(values, 'A1', '1')
+        self.assertIsNone(tracing.active())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,241 @@
+"""Memory of dead ends for bitboard.search().
+
+A TranspositionTable passed to bitboard.search() remembers boards proven to
+have no solution, and learns nogoods: small sets of branch assignments that
+propagate to a contradiction. The search abandons a board found in the table
+without propagating it, and on every board it reaches rules out the last
+assignment of any nogood whose other assignments all hold.
+
+Boards are keyed by a Zobrist hash of their candidates: every (box, digit)
+candidate has a random 64 bit key, and a board's key is the XOR of the keys
+of all its candidates. Setting a box to one digit changes the key by the keys
+of the candidates removed, so a branch's key is derived from its parent's in
+constant time. Two different boards share a key with a probability of about
+2 ** -64 per pair, which would make the search miss their solutions.
+
+Within one search every board differs from all the earlier ones in a box the
+search branched on, so failed boards only pay off when a table is shared by
+several searches, such as repeated solves of the same grids. They hold for
+any search with the same topology. Nogoods are what helps a single search:
+a nogood is learned from the last decisions of a branch that failed, and
+holds for the board the search started from, so the table drops its nogoods
+when a search starts from another board. On hard puzzles, nogoods of one
+assignment already cut the search nodes by about a third; longer ones prune
+a little more but cost more propagations to learn than they save.
+
+Failed boards, nogoods and the outcomes of the nogood tests are all bounded,
+and the least recently used entries are evicted first. The keys of the
+candidate masks met are cached per table, for the topologies small enough to
+get mask lookup tables; the keys of wider masks are computed every time.
+"""
+import collections
+import random
+
+import bitboard
+import topology as topologies
+
+
+class TranspositionTable(object):
+    """Failed boards and nogoods remembered across the nodes of bitboard.search().
+
+    Args:
+        capacity(int): failed board keys kept.
+        nogood_size(int): largest number of assignments a learned nogood may have;
+            0 turns nogood learning off.
+        max_nogoods(int): nogoods kept, and nogood test outcomes remembered.
+        topology(topology.Topology): shape of the boards searched.
+        seed(int): seed of the Zobrist keys.
+    Attributes:
+        lookups, hits: failed board lookups and the ones that found the board.
+        stores, evictions: failed boards added and dropped for lack of room.
+        nogoods_learned, nogood_hits: nogoods added, and candidates or boards they ruled out.
+        learn_propagations: propagations spent testing candidate nogoods.
+    """
+
+    def __init__(self, capacity=1 << 16, nogood_size=1, max_nogoods=1024, topology=bitboard.STANDARD, seed=0):
+        self.capacity = capacity
+        self.nogood_size = nogood_size
+        self.max_nogoods = max_nogoods
+        self.topology = topology
+        rng = random.Random(seed)
+        self._digit_keys = [[rng.getrandbits(64) for _ in range(topology.size)] for _ in range(topology.cells)]
+        self._cell_keys = None
+        if topology.size <= topologies.MAX_TABLE_BITS:
+            self._cell_keys = [{} for _ in range(topology.cells)]
+        self._failed = collections.OrderedDict()
+        self._root = None
+        self._nogoods = collections.OrderedDict()
+        self._tested = collections.OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.nogoods_learned = 0
+        self.nogood_hits = 0
+        self.learn_propagations = 0
+
+    def __len__(self):
+        return len(self._failed)
+
+    def cell_key(self, cell, mask):
+        """Return the XOR of the keys of the candidates of mask in cell."""
+        if self._cell_keys is None:
+            return self._mask_key(cell, mask)
+        keys = self._cell_keys[cell]
+        key = keys.get(mask)
+        if key is None:
+            key = keys[mask] = self._mask_key(cell, mask)
+        return key
+
+    def _mask_key(self, cell, mask):
+        digit_keys = self._digit_keys[cell]
+        key = 0
+        while mask:
+            bit = mask & -mask
+            key ^= digit_keys[bit.bit_length() - 1]
+            mask ^= bit
+        return key
+
+    def board_key(self, board):
+        """Return the Zobrist key of a board."""
+        key = 0
+        if self._cell_keys is not None:
+            try:
+                for keys, mask in zip(self._cell_keys, board):
+                    key ^= keys[mask]
+                return key
+            except KeyError:
+                key = 0
+        for cell, mask in enumerate(board):
+            key ^= self.cell_key(cell, mask)
+        return key
+
+    def start(self, key):
+        """Prepare for a search from the board with the given key, dropping the nogoods of any other board."""
+        if key != self._root:
+            self._root = key
+            self._nogoods.clear()
+            self._tested.clear()
+
+    def failed(self, key):
+        """Return True if the board with the given key is known to have no solution."""
+        self.lookups += 1
+        if key in self._failed:
+            self._failed.move_to_end(key)
+            self.hits += 1
+            return True
+        return False
+
+    def store(self, key):
+        """Remember that the board with the given key has no solution."""
+        if key in self._failed:
+            self._failed.move_to_end(key)
+            return
+        self._failed[key] = None
+        self.stores += 1
+        if len(self._failed) > self.capacity:
+            self._failed.popitem(last=False)
+            self.evictions += 1
+
+    def prune(self, board):
+        """Apply the nogoods to a reduced board.
+
+        A nogood all of whose assignments but one hold rules that last one out, and the
+        board is propagated again after each such elimination.
+
+        Input: A reduced board, updated in place.
+        Output: The board, or False if every assignment of a nogood holds or propagating
+            the eliminations leads to a contradiction.
+        """
+        while True:
+            changed = []
+            used = []
+            violated = False
+            for nogood in self._nogoods:
+                last = None
+                for cell, bit in nogood:
+                    if board[cell] != bit:
+                        if last is not None or not board[cell] & bit:
+                            break
+                        last = cell, bit
+                else:
+                    used.append(nogood)
+                    if last is None:
+                        violated = True
+                        break
+                    board[last[0]] &= ~last[1]
+                    changed.append(last[0])
+            self.nogood_hits += len(used)
+            for nogood in used:
+                self._nogoods.move_to_end(nogood)
+            if violated:
+                return False
+            if not changed:
+                return board
+            board = bitboard.propagate(board, changed, topology=self.topology)
+            if board is False:
+                return False
+
+    def learn(self, root, decisions):
+        """Learn a nogood from a branch of the search that propagated to a contradiction.
+
+        The contradiction always needs the last decision. The nogood is the last decision
+        with as few of the decisions just before it as are needed for root to propagate
+        to a contradiction too, or nothing if that takes more than nogood_size of them.
+
+        Input: The reduced board the search started from and the (cell, bit) decisions
+            that lead from it to the contradiction.
+        """
+        for size in range(1, min(self.nogood_size, len(decisions)) + 1):
+            nogood = decisions[-size:]
+            if self._fails(root, nogood):
+                self._add_nogood(tuple(sorted(nogood)))
+                return
+
+    def _fails(self, root, decisions):
+        # Branches of the same search often fail on the same last decisions, so the
+        # outcome is kept, for as many decisions as there may be nogoods, until the
+        # search starts from another board.
+        tested = tuple(decisions)
+        failed = self._tested.get(tested)
+        if failed is None:
+            failed = self._tested[tested] = self._propagates_to_contradiction(root, decisions)
+            if len(self._tested) > self.max_nogoods:
+                self._tested.popitem(last=False)
+        else:
+            self._tested.move_to_end(tested)
+        return failed
+
+    def _propagates_to_contradiction(self, root, decisions):
+        board = root[:]
+        for cell, bit in decisions:
+            board[cell] = bit
+        self.learn_propagations += 1
+        return bitboard.propagate(board, [cell for cell, _ in decisions], topology=self.topology) is False
+
+    def _add_nogood(self, nogood):
+        if nogood in self._nogoods:
+            return
+        self._nogoods[nogood] = None
+        self.nogoods_learned += 1
+        if len(self._nogoods) > self.max_nogoods:
+            self._nogoods.popitem(last=False)
+
+    def hit_rate(self):
+        """Return the fraction of failed board lookups that hit, 0.0 before any lookup."""
+        return self.hits / float(self.lookups) if self.lookups else 0.0
+
+    def as_dict(self):
+        """Return the counters and sizes as plain data."""
+        return {
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate(),
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'entries': len(self._failed),
+            'nogoods': len(self._nogoods),
+            'nogoods_learned': self.nogoods_learned,
+            'nogood_hits': self.nogood_hits,
+            'learn_propagations': self.learn_propagations,
+        }
@@ -0,0 +1,99 @@
+import benchmark
+import bitboard
+import solution
+import solution_test
+import stats
+import topology
+import transposition
+import unittest
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = transposition.TranspositionTable()
+
+    def test_incremental_key(self):
+        board = bitboard.grid_board(solution_test.TestDiagonalSudoku.diagonal_grid)
+        cell = next(i for i, mask in enumerate(board) if bitboard.BIT_COUNT[mask] > 1)
+        bit = next(bit for bit in bitboard.SINGLE_BITS if board[cell] & bit)
+        child = board[:]
+        child[cell] = bit
+        key = self.table.board_key(board) ^ self.table.cell_key(cell, board[cell]) ^ self.table.cell_key(cell, bit)
+        self.assertEqual(self.table.board_key(child), key)
+        self.assertNotEqual(self.table.board_key(board), key)
+
+    def test_bounded(self):
+        table = transposition.TranspositionTable(capacity=2)
+        for key in (1, 2, 3):
+            table.store(key)
+        self.assertEqual(len(table), 2)
+        self.assertFalse(table.failed(1))
+        self.assertTrue(table.failed(2))
+        table.store(4)
+        self.assertTrue(table.failed(2))
+        self.assertFalse(table.failed(3))
+        self.assertEqual(table.evictions, 2)
+        self.assertEqual(table.hit_rate(), 0.5)
+
+    def test_wide_masks(self):
+        wide = topology.get(5)
+        table = transposition.TranspositionTable(topology=wide)
+        board = bitboard.grid_board('.' * wide.cells, wide)
+        child = board[:]
+        child[0] = wide.single_bits[0]
+        key = table.board_key(board) ^ table.cell_key(0, board[0]) ^ table.cell_key(0, child[0])
+        self.assertEqual(table.board_key(child), key)
+        self.assertIsNone(table._cell_keys)
+
+    def test_topology_mismatch(self):
+        self.assertRaises(ValueError, solution.solve, '.' * 256, topology=topology.get(4), table=self.table)
+
+    def test_nogoods(self):
+        root = bitboard.reduce_puzzle(bitboard.grid_board(benchmark.load_corpus('hard')[0]))
+        failing = []
+        for cell, mask in enumerate(root):
+            for bit in bitboard.SINGLE_BITS:
+                if mask & bit and mask != bit:
+                    board = root[:]
+                    board[cell] = bit
+                    if bitboard.propagate(board, (cell,)) is False:
+                        failing.append((cell, bit))
+        self.assertTrue(failing)
+        cell, bit = failing[0]
+        self.table.start(self.table.board_key(root))
+        self.table.learn(root, [(cell, bit)])
+        self.assertEqual(self.table.nogoods_learned, 1)
+        pruned = self.table.prune(root[:])
+        self.assertFalse(pruned[cell] & bit)
+        self.table.start(0)
+        self.assertEqual(self.table.prune(root[:]), root)
+        table = transposition.TranspositionTable(max_nogoods=2)
+        table.start(table.board_key(root))
+        for decision in failing[:3]:
+            table.learn(root, [decision])
+        self.assertEqual(len(table._tested), min(len(failing), 2))
+
+    def test_search(self):
+        for grid in benchmark.load_corpus('hard')[:5] + benchmark.load_corpus('unsolvable')[:5]:
+            self.assertEqual(bitboard.search(bitboard.grid_board(grid), table=transposition.TranspositionTable()),
+                             bitboard.search(bitboard.grid_board(grid)))
+
+    def test_shared_table(self):
+        grid = benchmark.load_corpus('unsolvable')[5]
+        first, second = stats.SolverStats(), stats.SolverStats()
+        self.assertFalse(solution.solve(grid, stats=first, table=self.table))
+        self.assertFalse(solution.solve(grid, stats=second, table=self.table))
+        self.assertEqual(second.nodes, 1)
+        self.assertTrue(first.nodes > 1)
+        self.assertEqual(self.table.hits, 1)
+        self.assertRaises(ValueError, solution.solve, grid, engine='dlx', table=self.table)
+
+    def test_benchmark(self):
+        measurements = benchmark.run_tier('bitboard', benchmark.load_corpus('hard')[:2], table=True)
+        self.assertEqual(measurements['solved'], 2)
+        self.assertIn('hit_rate', measurements['table'])
+
+
+if __name__ == '__main__':
+    unittest.main()
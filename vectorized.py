@@ -0,0 +1,146 @@
+"""Vectorized NumPy propagation for solving large batches of grids at once.
+
+A batch is an (N, 81) uint16 array holding one bitboard per row, with the same
+candidate masks as bitboard.py. eliminate and only_choice are applied to every
+row at once through peer and unit index tables built from bitboard.PEERS and
+bitboard.UNITS (so the diagonals are included). Rows that stall before being
+solved fall back to bitboard.search.
+
+NumPy is only needed by this module; the rest of the solver does not use it.
+"""
+import numpy as np
+
+import bitboard
+
+FULL = bitboard.FULL
+POPCOUNT = np.array(bitboard.BIT_COUNT, dtype=np.uint8)
+
+
+def _padded_index(groups, pad):
+    """Stack ragged index tuples into a rectangular array, filling the gaps with pad."""
+    width = max(len(group) for group in groups)
+    return np.array([group + (pad,) * (width - len(group)) for group in groups], dtype=np.intp)
+
+
+UNIT_INDEX = np.array(bitboard.UNITS, dtype=np.intp)
+# Both tables point their padding at an extra all-zero column appended before indexing.
+PEER_INDEX = _padded_index(bitboard.PEERS, len(bitboard.PEERS))
+CELL_UNIT_INDEX = _padded_index(bitboard.CELL_UNITS, len(bitboard.UNITS))
+
+# Maps the bytes of a grid string to candidate masks ('.' is an empty box).
+_CHAR_MASK = np.zeros(256, dtype=np.uint16)
+_CHAR_MASK[ord('.')] = FULL
+for _digit, _mask in bitboard.DIGIT_MASK.items():
+    _CHAR_MASK[ord(_digit)] = _mask
+
+
+def grids_boards(grids):
+    """Convert a sequence of 81 character grid strings into an (N, 81) array of boards."""
+    data = ''.join(grids).encode('ascii')
+    assert len(data) == 81 * len(grids)
+    return _CHAR_MASK[np.frombuffer(data, dtype=np.uint8)].reshape(len(grids), 81)
+
+
+# Maps the 4 bit boxes of packed.GRIDS records to candidate masks (0 is an empty box).
+_NIBBLE_MASK = np.zeros(16, dtype=np.uint16)
+_NIBBLE_MASK[0] = FULL
+_NIBBLE_MASK[1:10] = bitboard.SINGLE_BITS
+
+
+def packed_boards(records):
+    """Convert a batch of packed records, as yielded by packed.Reader.batches(), into an (N, 81) array of boards.
+
+    The records are left untouched: the boards are a new array that the solver may update.
+    """
+    if records.dtype == np.uint8:
+        nibbles = np.empty((len(records), 2 * records.shape[1]), dtype=np.uint8)
+        nibbles[:, 0::2] = records >> 4
+        nibbles[:, 1::2] = records & 15
+        return _NIBBLE_MASK[nibbles[:, :81]]
+    return records.astype(np.uint16)
+
+
+def _with_zero_column(array):
+    return np.concatenate((array, np.zeros((len(array), 1), dtype=array.dtype)), axis=1)
+
+
+def eliminate(boards):
+    """Remove the digit of every solved box from its peers, for every board in the batch."""
+    singles = np.where(POPCOUNT[boards] == 1, boards, 0).astype(np.uint16)
+    taken = np.bitwise_or.reduce(_with_zero_column(singles)[:, PEER_INDEX], axis=2)
+    boards &= ~taken
+    return boards
+
+
+def only_choice(boards):
+    """Assign the digits that fit in only one box of a unit, for every board in the batch.
+
+    Returns:
+        A boolean array, True for the boards where a unit cannot place a digit or a box
+        is the only choice for two different digits.
+    """
+    units = boards[:, UNIT_INDEX]
+    once = np.zeros(units.shape[:2], dtype=np.uint16)
+    twice = np.zeros_like(once)
+    for k in range(units.shape[2]):
+        twice |= once & units[:, :, k]
+        once |= units[:, :, k]
+    invalid = (once != FULL).any(axis=1)
+    unique = once & ~twice
+    hidden = np.bitwise_or.reduce(_with_zero_column(unique)[:, CELL_UNIT_INDEX], axis=2) & boards
+    invalid |= (POPCOUNT[hidden] > 1).any(axis=1)
+    np.copyto(boards, hidden, where=hidden != 0)
+    return invalid
+
+
+def propagate(boards):
+    """Run eliminate and only_choice on a batch until every board stops changing.
+
+    Boards that are finished (stalled, solved or contradictory) drop out of the
+    working set, so later rounds only touch the boards still making progress.
+
+    Input: An (N, 81) uint16 array of boards, updated in place.
+    Output: A boolean array, True for the boards that reached a contradiction.
+    """
+    invalid = np.zeros(len(boards), dtype=bool)
+    active = np.arange(len(boards))
+    while len(active):
+        work = boards[active]
+        before = work.copy()
+        eliminate(work)
+        bad = only_choice(work)
+        bad |= (work == 0).any(axis=1)
+        boards[active] = work
+        invalid[active[bad]] = True
+        active = active[(work != before).any(axis=1) & ~bad]
+    return invalid
+
+
+def solve_batch(grids):
+    """Solve a batch of grids, searching only the ones propagation alone cannot finish.
+
+    Args:
+        grids: sequence of grid strings, 81 characters long.
+    Returns:
+        A list with the dictionary form of each solution, or False where there is none,
+        matching solution.solve().
+    """
+    return solve_boards(grids_boards(grids))
+
+
+def solve_boards(boards):
+    """Solve an (N, 81) array of boards, updated in place, like solve_batch()."""
+    invalid = propagate(boards)
+    solved = (POPCOUNT[boards] == 1).all(axis=1)
+    results = []
+    for board, bad, done in zip(boards.tolist(), invalid.tolist(), solved.tolist()):
+        if bad:
+            results.append(False)
+            continue
+        if not done:
+            board = bitboard.search(board)
+            if board is False:
+                results.append(False)
+                continue
+        results.append(bitboard.board_values(board))
+    return results
@@ -0,0 +1,32 @@
+import solution
+import solution_test
+import unittest
+
+try:
+    import numpy
+    import vectorized
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class TestVectorized(unittest.TestCase):
+    grids = [solution_test.TestDiagonalSudoku.diagonal_grid,
+             '11' + '.' * 79,
+             '.' * 81]
+
+    def test_grids_boards(self):
+        boards = vectorized.grids_boards(self.grids)
+        self.assertEqual(boards.shape, (3, 81))
+        self.assertEqual(boards[0, 0], 0b10)
+        self.assertEqual(boards[0, 1], vectorized.FULL)
+
+    def test_propagate_flags_contradictions(self):
+        boards = vectorized.grids_boards(self.grids)
+        self.assertEqual(vectorized.propagate(boards).tolist(), [False, True, False])
+
+    def test_solve_batch_matches_solve(self):
+        self.assertEqual(vectorized.solve_batch(self.grids), [solution.solve(grid) for grid in self.grids])
+
+if __name__ == '__main__':
+    unittest.main()
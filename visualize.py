@@ -1,17 +1,110 @@
+"""Replay the changes recorded by a tracing.Recorder as board images.
+
+visualize_assignments() animates a solve in a pygame window. export_frames()
+and export_animation() render the same steps without a display, through
+pygame's dummy video driver, so that traces can be rendered on servers:
+
+    python visualize.py <grid> 'frames/step-{:04d}.png'
+
+The steps are streamed from the recorder one at a time, so rendering a trace
+holds a single board in memory however long the trace is.
+"""
+import os
+import sys
+
 from PySudoku import play
 
-def visualize_assignments(assignments):
-    """ Visualizes the set of assignments created by the Sudoku AI"""
-    last_assignment = None
-    filtered_assignments = []
-
-    for i in range(len(assignments)):
-        if last_assignment:
-            last_assignment_items = [item for item in last_assignment.items() if len(item[1]) == 1]
-            current_assignment_items = [item for item in assignments[i].items() if len(item[1]) == 1]
-            shared_items = set(last_assignment_items) & set(current_assignment_items)
-            if len(shared_items) < len(current_assignment_items):
-                filtered_assignments.append(assignments[i])
-        last_assignment = assignments[i]
-
-    play(filtered_assignments)
+BACKGROUND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images', 'sudoku-board-bare.jpg')
+SIZE = (700, 700)
+
+
+def solved_steps(recorder):
+    """Yield the board after every recorded change that solves a box or, when backtracking, unsolves one.
+
+    The same dictionary is yielded every time, updated in place, so copy it to keep it.
+    """
+    for (box, old, new), (_, values) in zip(recorder.deltas, recorder.replay()):
+        if len(new) == 1 or len(old) == 1:
+            yield values
+
+
+def visualize_assignments(recorder):
+    """ Visualizes the assignments recorded by a tracing.Recorder while the Sudoku AI solved a grid"""
+    play(solved_steps(recorder))
+
+
+def _headless_renderer():
+    # Render to an off-screen surface; the dummy driver needs no display.
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    import PySudoku
+    pygame.display.init()
+    pygame.font.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+    surface = pygame.Surface(SIZE)
+    return PySudoku.BoardRenderer(surface, pygame.image.load(BACKGROUND).convert())
+
+
+def export_frames(recorder, pattern):
+    """Write an image of the board at every solved step of a recorder, without a display.
+
+    Args:
+        recorder(tracing.Recorder): the recorded solve.
+        pattern(string): file name with a format field for the step number, such as
+            'frames/step-{:04d}.png'. The extension picks the image format.
+    Returns:
+        The number of frames written.
+    """
+    import pygame
+    renderer = _headless_renderer()
+    count = 0
+    for values in solved_steps(recorder):
+        renderer.draw(values)
+        pygame.image.save(renderer.screen, pattern.format(count))
+        count += 1
+    return count
+
+
+def export_animation(recorder, path, duration=200):
+    """Write the solved steps of a recorder as one animated GIF, without a display.
+
+    Needs Pillow, which keeps the palette-reduced frames in memory until the file is written.
+
+    Args:
+        recorder(tracing.Recorder): the recorded solve.
+        path(string): the GIF file to write.
+        duration(int): milliseconds each frame is shown.
+    Returns:
+        The number of frames written.
+    """
+    import pygame
+    from PIL import Image
+    renderer = _headless_renderer()
+    frames = []
+    for values in solved_steps(recorder):
+        renderer.draw(values)
+        image = Image.frombytes('RGB', SIZE, pygame.image.tostring(renderer.screen, 'RGB'))
+        frames.append(image.quantize(colors=64))
+    if frames:
+        frames[0].save(path, save_all=True, append_images=frames[1:], duration=duration, loop=0)
+    return len(frames)
+
+
+def main(argv=None):
+    """Solve a grid and export its solved steps: visualize.py <grid> <pattern or .gif path>."""
+    import solution
+    import tracing
+    grid, path = (sys.argv[1:] if argv is None else argv)[:2]
+    recorder = tracing.Recorder()
+    solution.solve(grid, recorder=recorder)
+    if path.endswith('.gif'):
+        count = export_animation(recorder, path)
+    else:
+        count = export_frames(recorder, path)
+    print('{} frames written'.format(count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import os
+import shutil
+import solution
+import solution_test
+import tempfile
+import tracing
+import unittest
+
+try:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    import visualize
+except ImportError:
+    pygame = None
+
+try:
+    import PIL
+except ImportError:
+    PIL = None
+
+
+@unittest.skipIf(pygame is None, 'pygame is not installed')
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = tracing.Recorder()
+        solution.solve(solution_test.TestDiagonalSudoku.diagonal_grid, recorder=self.recorder)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        pygame.quit()
+
+    def test_solved_steps(self):
+        steps = list(visualize.solved_steps(self.recorder))
+        self.assertTrue(steps)
+        # One board, updated in place, whatever the length of the trace.
+        self.assertTrue(all(values is steps[0] for values in steps))
+        self.assertEqual(steps[-1], solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_solved_steps_include_backtracking(self):
+        recorder = tracing.Recorder()
+        recorder.start({'A1': '12', 'A2': '3'})
+        mark = recorder.mark()
+        recorder.record('A1', '12', '1')
+        recorder.record('A2', '3', '')
+        recorder.rewind(mark)
+        frames = [dict(values) for values in visualize.solved_steps(recorder)]
+        self.assertEqual(frames, [{'A1': '1', 'A2': '3'}, {'A1': '1', 'A2': ''},
+                                  {'A1': '1', 'A2': '3'}, {'A1': '12', 'A2': '3'}])
+
+    def test_export_frames(self):
+        pattern = os.path.join(self.directory, 'step-{:04d}.png')
+        count = visualize.export_frames(self.recorder, pattern)
+        self.assertEqual(count, sum(1 for _ in visualize.solved_steps(self.recorder)))
+        self.assertEqual(sorted(os.listdir(self.directory)), ['step-{:04d}.png'.format(i) for i in range(count)])
+        self.assertEqual(pygame.image.load(pattern.format(count - 1)).get_size(), visualize.SIZE)
+
+    @unittest.skipIf(PIL is None, 'Pillow is not installed')
+    def test_export_animation(self):
+        path = os.path.join(self.directory, 'solve.gif')
+        count = visualize.export_animation(self.recorder, path)
+        from PIL import Image
+        self.assertEqual(Image.open(path).n_frames, count)
+
+
+if __name__ == '__main__':
+    unittest.main()